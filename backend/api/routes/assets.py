@@ -2,22 +2,31 @@
 Asset tokenization API routes
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 
-from database.database import get_db
-from models.models import User, Asset, Transaction
+from database.database import get_db, get_async_db, get_read_db, read_your_writes
+from models.models import User, Asset, AssetIncomeRollup, Transaction
 from schemas.schemas import (
     AssetTokenizeRequest, AssetTokenizeResponse, AssetResponse, APIResponse
 )
+from services.asset_catalog import asset_catalog
+from services.asset_holders import asset_holders
 from services.hedera_service import hedera_service
+from services.holding_ledger import holding_ledger
 from utils.auth import get_current_user
 
 router = APIRouter()
 
 
-@router.post("/tokenize", response_model=APIResponse)
+@router.post(
+    "/tokenize",
+    response_model=APIResponse,
+    dependencies=[Depends(read_your_writes)]
+)
 async def tokenize_asset(
     request: AssetTokenizeRequest,
     db: Session = Depends(get_db),
@@ -93,6 +102,7 @@ async def tokenize_asset(
         )
         db.add(asset)
         db.flush()  # Get asset ID
+        asset_catalog.record_created(db, asset.asset_type)
         
         # Record transactions
         nft_transaction = Transaction(
@@ -147,18 +157,27 @@ async def tokenize_asset(
 @router.get("/list", response_model=APIResponse)
 async def list_assets(
     asset_type: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """List all tokenized assets"""
+    """List tokenized assets newest first, one keyset page at a time"""
     try:
-        query = db.query(Asset)
+        try:
+            query = asset_catalog.page_query(asset_type, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         
-        if asset_type:
-            query = query.filter(Asset.asset_type == asset_type)
+        assets = (await db.scalars(query)).all()
+        total = await db.scalar(asset_catalog.total_query(asset_type))
         
-        assets = query.offset(skip).limit(limit).all()
+        next_cursor = None
+        if len(assets) > limit:
+            assets = assets[:limit]
+            next_cursor = asset_catalog.next_cursor(assets[-1])
         
         assets_data = [AssetResponse.from_orm(asset) for asset in assets]
         
@@ -167,10 +186,13 @@ async def list_assets(
             message="Assets retrieved successfully",
             data={
                 "assets": assets_data,
-                "total": len(assets_data)
+                "total": total,
+                "next_cursor": next_cursor
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -181,11 +203,14 @@ async def list_assets(
 @router.get("/{asset_id}", response_model=APIResponse)
 async def get_asset(
     asset_id: int,
-    db: Session = Depends(get_db)
+    top: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detailed asset information"""
     try:
-        asset = db.query(Asset).filter(Asset.id == asset_id).first()
+        asset = await db.scalar(
+            select(Asset).options(selectinload(Asset.creator)).where(Asset.id == asset_id)
+        )
         
         if not asset:
             raise HTTPException(
@@ -193,29 +218,17 @@ async def get_asset(
                 detail="Asset not found"
             )
         
-        # Get token holders
-        from models.models import Holding
-        holdings = db.query(Holding).filter(
-            Holding.asset_id == asset_id
-        ).join(User).all()
-        
-        # Calculate ownership distribution
-        total_held = sum(holding.amount for holding in holdings)
-        ownership_distribution = []
-        
-        for holding in holdings:
-            ownership_percentage = (holding.amount / asset.total_supply) * 100
-            ownership_distribution.append({
-                "wallet_id": holding.user.wallet_id,
-                "tokens_held": holding.amount,
-                "ownership_percentage": ownership_percentage,
-                "purchase_price": holding.purchase_price
-            })
+        # Aggregates come from the maintained rollup; only the top holders are loaded
+        rollup = await db.get(AssetIncomeRollup, asset_id)
+        top_holders = (await db.execute(asset_holders.page_query(asset_id, top))).all()[:top]
         
         asset_data = {
             **AssetResponse.from_orm(asset).dict(),
-            "tokens_in_circulation": total_held,
-            "ownership_distribution": ownership_distribution,
+            **asset_holders.totals(rollup),
+            "top_holders": asset_holders.ownership(asset.total_supply, top_holders),
+            "concentration": asset_holders.concentration(
+                rollup, [holder.amount for holder in top_holders]
+            ),
             "creator_wallet": asset.creator.wallet_id if asset.creator else None
         }
         
@@ -234,7 +247,63 @@ async def get_asset(
         )
 
 
-@router.post("/{asset_id}/associate", response_model=APIResponse)
+@router.get("/{asset_id}/holders", response_model=APIResponse)
+async def list_asset_holders(
+    asset_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List an asset's token holders, largest first, one keyset page at a time"""
+    try:
+        asset = await db.get(Asset, asset_id)
+        
+        if not asset:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Asset not found"
+            )
+        
+        try:
+            query = asset_holders.page_query(asset_id, limit, cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        holders = (await db.execute(query)).all()
+        
+        next_cursor = None
+        if len(holders) > limit:
+            holders = holders[:limit]
+            next_cursor = asset_holders.next_cursor(holders[-1].user_id, holders[-1].amount)
+        
+        rollup = await db.get(AssetIncomeRollup, asset_id)
+        return APIResponse(
+            success=True,
+            message="Asset holders retrieved",
+            data={
+                "holders": asset_holders.ownership(asset.total_supply, holders),
+                "holder_count": asset_holders.totals(rollup)["holder_count"],
+                "next_cursor": next_cursor
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@router.post(
+    "/{asset_id}/associate",
+    response_model=APIResponse,
+    dependencies=[Depends(read_your_writes)]
+)
 async def associate_token(
     asset_id: int,
     association_data: dict,
@@ -302,7 +371,11 @@ async def associate_token(
         )
 
 
-@router.post("/{asset_id}/transfer", response_model=APIResponse)
+@router.post(
+    "/{asset_id}/transfer",
+    response_model=APIResponse,
+    dependencies=[Depends(read_your_writes)]
+)
 async def transfer_asset_tokens(
     asset_id: int,
     transfer_data: dict,
@@ -344,38 +417,12 @@ async def transfer_asset_tokens(
                 detail=f"Token transfer failed: {result.get('error')}"
             )
         
-        # Update holdings in database
-        from models.models import Holding
-        
-        # Reduce sender's holding
-        sender_holding = db.query(Holding).filter(
-            Holding.user_id == current_user.id,
-            Holding.asset_id == asset_id
-        ).first()
-        
-        if sender_holding:
-            sender_holding.amount -= float(amount)
-            if sender_holding.amount <= 0:
-                db.delete(sender_holding)
+        # Update holdings in database with single-statement SQL arithmetic
+        holding_ledger.debit(db, current_user.id, asset_id, float(amount))
         
-        # Increase receiver's holding
         receiver = db.query(User).filter(User.wallet_id == to_account).first()
         if receiver:
-            receiver_holding = db.query(Holding).filter(
-                Holding.user_id == receiver.id,
-                Holding.asset_id == asset_id
-            ).first()
-            
-            if receiver_holding:
-                receiver_holding.amount += float(amount)
-            else:
-                new_holding = Holding(
-                    user_id=receiver.id,
-                    asset_id=asset_id,
-                    ft_id=asset.ft_id,
-                    amount=float(amount)
-                )
-                db.add(new_holding)
+            holding_ledger.credit(db, receiver.id, asset_id, asset.ft_id, float(amount))
         
         # Record transaction
         transaction = Transaction(
@@ -3,21 +3,27 @@ KYC management API routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 
-from database.database import get_db
+from database.database import get_db, get_read_db, read_your_writes
 from models.models import User, KYCSubmission
 from schemas.schemas import (
     KYCSubmissionRequest, KYCSubmissionResponse, APIResponse
 )
 from services.hedera_service import hedera_service
-from utils.auth import get_current_user
+from utils.auth import get_current_user, invalidate_principal
 
 router = APIRouter()
 
 
-@router.post("/submit", response_model=APIResponse)
+@router.post(
+    "/submit",
+    response_model=APIResponse,
+    dependencies=[Depends(read_your_writes)]
+)
 async def submit_kyc(
     request: KYCSubmissionRequest,
     db: Session = Depends(get_db)
@@ -72,6 +78,7 @@ async def submit_kyc(
         user.kyc_hash = request.document_hash
         
         db.commit()
+        invalidate_principal(user.id)
         db.refresh(kyc_submission)
         
         return APIResponse(
@@ -147,7 +154,11 @@ async def get_kyc_status(
         )
 
 
-@router.post("/verify/{submission_id}", response_model=APIResponse)
+@router.post(
+    "/verify/{submission_id}",
+    response_model=APIResponse,
+    dependencies=[Depends(read_your_writes)]
+)
 async def verify_kyc(
     submission_id: int,
     verification_data: dict,
@@ -179,6 +190,7 @@ async def verify_kyc(
                 user.kyc_verified = True
         
         db.commit()
+        invalidate_principal(kyc_submission.user_id)
         
         return APIResponse(
             success=True,
@@ -204,17 +216,17 @@ async def list_kyc_submissions(
     status_filter: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """List KYC submissions (admin only)"""
     try:
-        query = db.query(KYCSubmission).join(User)
+        query = select(KYCSubmission).join(User).options(selectinload(KYCSubmission.user))
         
         if status_filter:
-            query = query.filter(KYCSubmission.verification_status == status_filter)
+            query = query.where(KYCSubmission.verification_status == status_filter)
         
-        submissions = query.offset(skip).limit(limit).all()
+        submissions = (await db.scalars(query.offset(skip).limit(limit))).all()
         
         submissions_data = []
         for submission in submissions:
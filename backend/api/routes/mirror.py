@@ -2,13 +2,20 @@
 Mirror Node API routes for querying Hedera transaction data
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 
-from database.database import get_db
+from database.database import UPSERT_INSERTS, get_async_db, get_read_db
 from models.models import User, Asset
 from schemas.schemas import APIResponse
+from services.holder_snapshots import holder_snapshots
+from services.mirror_indexer import mirror_indexer
 from services.mirror_service import mirror_service
 
 router = APIRouter()
@@ -31,7 +38,7 @@ async def get_account_info(account_id: str):
             message="Account information retrieved",
             data=account_info
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -45,15 +52,25 @@ async def get_account_info(account_id: str):
 async def get_account_transactions(
     account_id: str,
     limit: int = 25,
-    order: str = "desc"
+    order: str = "desc",
+    live: bool = False,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get transaction history for an account"""
     try:
-        transactions = await mirror_service.get_account_transactions(
-            account_id=account_id,
-            limit=limit,
-            order=order
-        )
+        # Recently synced accounts are served from the local Mirror Node index
+        if not live and await db.run_sync(mirror_indexer.is_fresh, account_id):
+            transactions = {
+                "transactions": await db.run_sync(
+                    mirror_indexer.query_account_transactions, account_id, limit=limit, order=order
+                )
+            }
+        else:
+            transactions = await mirror_service.get_account_transactions(
+                account_id=account_id,
+                limit=limit,
+                order=order
+            )
         
         if "error" in transactions:
             raise HTTPException(
@@ -77,7 +94,7 @@ async def get_account_transactions(
                 "total": len(formatted_transactions)
             }
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -87,6 +104,30 @@ async def get_account_transactions(
         )
 
 
+@router.get("/transactions/{account_id}/stream")
+async def stream_account_transactions(
+    account_id: str,
+    order: str = "desc",
+    page_size: int = 100
+):
+    """Stream an account's full transaction history as NDJSON"""
+    page_size = max(1, min(page_size, 100))  # Mirror Node caps pages at 100 rows
+    
+    async def ndjson_lines():
+        try:
+            async for tx in mirror_service.iter_account_transactions(
+                account_id=account_id,
+                order=order,
+                page_size=page_size
+            ):
+                yield json.dumps(mirror_service.format_transaction_for_frontend(tx)) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield json.dumps({"error": str(e), "status": "failed"}) + "\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
 @router.get("/tokens/{token_id}", response_model=APIResponse)
 async def get_token_info(token_id: str):
     """Get token information from Mirror Node"""
@@ -104,7 +145,7 @@ async def get_token_info(token_id: str):
             message="Token information retrieved",
             data=token_info
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -131,7 +172,7 @@ async def get_token_balances(account_id: str):
             message="Token balances retrieved",
             data=balances
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -158,7 +199,7 @@ async def get_nft_info(token_id: str, serial_number: int):
             message="NFT information retrieved",
             data=nft_info
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -187,7 +228,7 @@ async def get_transaction_info(transaction_id: str):
             message="Transaction information retrieved",
             data=formatted_tx
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -222,7 +263,7 @@ async def get_topic_messages(
             message="Topic messages retrieved",
             data=messages
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -232,11 +273,61 @@ async def get_topic_messages(
         )
 
 
+@router.get("/cache/stats", response_model=APIResponse)
+async def get_cache_stats():
+    """Get Mirror Node response cache metrics"""
+    return APIResponse(
+        success=True,
+        message="Cache statistics retrieved",
+        data=mirror_service.cache.stats()
+    )
+
+
+def _load_local_portfolio(db: Session, account_id: str) -> Optional[dict]:
+    """Load asset fraction holdings and user info from the local database"""
+    from models.models import Holding
+    
+    user = db.query(User).filter(User.wallet_id == account_id).first()
+    if not user:
+        return None
+    
+    holdings = db.query(Holding).filter(
+        Holding.user_id == user.id
+    ).join(Asset).all()
+    
+    # Add asset fraction holdings
+    asset_holdings = []
+    for holding in holdings:
+        asset_holdings.append({
+            "asset_id": holding.asset.id,
+            "asset_name": holding.asset.name,
+            "asset_type": holding.asset.asset_type,
+            "tokens_held": holding.amount,
+            "total_supply": holding.asset.total_supply,
+            "ownership_percentage": (holding.amount / holding.asset.total_supply) * 100,
+            "asset_valuation": holding.asset.valuation,
+            "estimated_value": (holding.amount / holding.asset.total_supply) * holding.asset.valuation
+        })
+    
+    return {
+        "asset_fraction_holdings": asset_holdings,
+        "user_info": {
+            "kyc_verified": user.kyc_verified,
+            "name": user.name,
+            "email": user.email
+        }
+    }
+
+
 @router.get("/portfolio/{account_id}", response_model=APIResponse)
-async def get_portfolio_summary(account_id: str, db: Session = Depends(get_db)):
+async def get_portfolio_summary(account_id: str, db: AsyncSession = Depends(get_read_db)):
     """Get complete portfolio summary for an account"""
     try:
-        portfolio = await mirror_service.get_portfolio_summary(account_id)
+        # Mirror Node sections and the local holdings query run concurrently
+        portfolio, local_portfolio = await asyncio.gather(
+            mirror_service.get_portfolio_summary(account_id),
+            db.run_sync(_load_local_portfolio, account_id)
+        )
         
         if "error" in portfolio:
             raise HTTPException(
@@ -245,40 +336,15 @@ async def get_portfolio_summary(account_id: str, db: Session = Depends(get_db)):
             )
         
         # Enhance with local database information
-        user = db.query(User).filter(User.wallet_id == account_id).first()
-        if user:
-            from models.models import Holding
-            holdings = db.query(Holding).filter(
-                Holding.user_id == user.id
-            ).join(Asset).all()
-            
-            # Add asset fraction holdings
-            asset_holdings = []
-            for holding in holdings:
-                asset_holdings.append({
-                    "asset_id": holding.asset.id,
-                    "asset_name": holding.asset.name,
-                    "asset_type": holding.asset.asset_type,
-                    "tokens_held": holding.amount,
-                    "total_supply": holding.asset.total_supply,
-                    "ownership_percentage": (holding.amount / holding.asset.total_supply) * 100,
-                    "asset_valuation": holding.asset.valuation,
-                    "estimated_value": (holding.amount / holding.asset.total_supply) * holding.asset.valuation
-                })
-            
-            portfolio["asset_fraction_holdings"] = asset_holdings
-            portfolio["user_info"] = {
-                "kyc_verified": user.kyc_verified,
-                "name": user.name,
-                "email": user.email
-            }
+        if local_portfolio:
+            portfolio.update(local_portfolio)
         
         return APIResponse(
             success=True,
             message="Portfolio summary retrieved",
             data=portfolio
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -292,17 +358,18 @@ async def get_portfolio_summary(account_id: str, db: Session = Depends(get_db)):
 async def get_asset_related_transactions(
     account_id: str,
     asset_ids: Optional[str] = None,
-    db: Session = Depends(get_db)
+    live: bool = False,
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get transactions related to specific assets"""
     try:
         # Get asset tokens from database
-        query = db.query(Asset)
+        query = select(Asset)
         if asset_ids:
             asset_id_list = [int(id.strip()) for id in asset_ids.split(",")]
-            query = query.filter(Asset.id.in_(asset_id_list))
+            query = query.where(Asset.id.in_(asset_id_list))
         
-        assets = query.all()
+        assets = (await db.scalars(query)).all()
         asset_tokens = [asset.ft_id for asset in assets] + [asset.nft_id for asset in assets]
         
         if not asset_tokens:
@@ -312,11 +379,18 @@ async def get_asset_related_transactions(
                 data={"transactions": [], "total": 0}
             )
         
-        # Get asset-related transactions
-        transactions = await mirror_service.get_asset_related_transactions(
-            account_id=account_id,
-            asset_tokens=asset_tokens
-        )
+        # Get asset-related transactions, from the local index when it was synced recently
+        if not live and await db.run_sync(mirror_indexer.is_fresh, account_id):
+            transactions = {
+                "transactions": await db.run_sync(
+                    mirror_indexer.query_asset_transactions, account_id, asset_tokens
+                )
+            }
+        else:
+            transactions = await mirror_service.get_asset_related_transactions(
+                account_id=account_id,
+                asset_tokens=asset_tokens
+            )
         
         if "error" in transactions:
             raise HTTPException(
@@ -351,7 +425,7 @@ async def get_asset_related_transactions(
                 "total": len(formatted_transactions)
             }
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -364,16 +438,20 @@ async def get_asset_related_transactions(
 @router.get("/income-proof/{distribution_id}", response_model=APIResponse)
 async def get_income_distribution_proof(
     distribution_id: int,
-    db: Session = Depends(get_db)
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get blockchain proof of income distribution"""
+    """Get blockchain proof of income distribution, one page of transfer transactions at a time"""
     try:
-        from models.models import IncomeDistribution, IncomePayout
+        from models.models import IncomeDistribution, IncomePayout, TransactionProof
         
         # Get distribution and payouts
-        distribution = db.query(IncomeDistribution).filter(
-            IncomeDistribution.id == distribution_id
-        ).first()
+        distribution = await db.scalar(
+            select(IncomeDistribution).options(
+                selectinload(IncomeDistribution.asset), selectinload(IncomeDistribution.snapshot)
+            ).where(IncomeDistribution.id == distribution_id)
+        )
         
         if not distribution:
             raise HTTPException(
@@ -381,13 +459,17 @@ async def get_income_distribution_proof(
                 detail="Distribution not found"
             )
         
-        payouts = db.query(IncomePayout).filter(
+        # Batched transfers pay several holders, so payouts share transaction IDs
+        transactions_query = select(IncomePayout.transaction_id).where(
             IncomePayout.distribution_id == distribution_id,
             IncomePayout.transaction_id.isnot(None)
-        ).all()
+        ).group_by(IncomePayout.transaction_id)
+        total = await db.scalar(select(func.count()).select_from(transactions_query.subquery()))
         
-        # Get transaction proofs from Mirror Node
-        transaction_ids = [payout.transaction_id for payout in payouts]
+        # Get transaction proofs for this page of transactions
+        transaction_ids = list(await db.scalars(
+            transactions_query.order_by(func.min(IncomePayout.id)).offset(skip).limit(limit)
+        ))
         
         if not transaction_ids:
             return APIResponse(
@@ -396,17 +478,56 @@ async def get_income_distribution_proof(
                 data={
                     "distribution_id": distribution_id,
                     "proofs": [],
-                    "total": 0
+                    "total": total,
+                    "skip": skip,
+                    "limit": limit
                 }
             )
         
-        proofs = await mirror_service.get_income_distribution_proof(transaction_ids)
-        
-        if "error" in proofs:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to get income proofs: {proofs['error']}"
+        # Verified proofs are immutable, so serve them from the local store
+        stored_proofs = {
+            proof.transaction_id: proof
+            for proof in await db.scalars(
+                select(TransactionProof).where(TransactionProof.transaction_id.in_(transaction_ids))
             )
+        }
+        
+        missing_ids = [tx_id for tx_id in transaction_ids if tx_id not in stored_proofs]
+        fetched_proofs = {}
+        if missing_ids:
+            result = await mirror_service.get_income_distribution_proof(missing_ids)
+            
+            if "error" in result:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to get income proofs: {result['error']}"
+                )
+            
+            for proof in result["proofs"]:
+                fetched_proofs[proof["transaction_id"]] = proof
+            
+            verified = [proof for proof in fetched_proofs.values() if proof.get("result") == "SUCCESS"]
+            if verified:
+                # A concurrent request may have stored some of these proofs already
+                insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+                await db.execute(insert(TransactionProof).values(verified).on_conflict_do_nothing(
+                    index_elements=[TransactionProof.transaction_id]
+                ))
+                await db.commit()
+        
+        proofs = []
+        for tx_id in transaction_ids:
+            if tx_id in stored_proofs:
+                stored = stored_proofs[tx_id]
+                proofs.append({
+                    "transaction_id": stored.transaction_id,
+                    "consensus_timestamp": stored.consensus_timestamp,
+                    "result": stored.result,
+                    "transfers": stored.transfers or [],
+                    "token_transfers": stored.token_transfers or []
+                })
+            elif tx_id in fetched_proofs:
+                proofs.append(fetched_proofs[tx_id])
         
         return APIResponse(
             success=True,
@@ -417,10 +538,16 @@ async def get_income_distribution_proof(
                 "total_income": distribution.total_income,
                 "distribution_date": distribution.distribution_date,
                 "status": distribution.status,
-                **proofs
+                "holder_snapshot": (
+                    holder_snapshots.summary(distribution.snapshot) if distribution.snapshot else None
+                ),
+                "proofs": proofs,
+                "total": total,
+                "skip": skip,
+                "limit": limit
             }
         )
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -3,23 +3,30 @@ Income distribution and rewards API routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from database.database import get_db
-from models.models import User, Asset, IncomeDistribution, IncomePayout, Holding
+from database.database import get_db, get_read_db, read_your_writes
+from models.models import User, Asset, AssetIncomeRollup, IncomeDistribution, IncomePayout
 from schemas.schemas import (
     IncomeDistributionRequest, IncomeDistributionResponse, 
     IncomePayoutResponse, APIResponse
 )
-from services.scheduler import scheduler
+from services.income_rollups import income_rollups
+from services.scheduler import scheduler, RESUMABLE_STATUSES
 from utils.auth import get_current_user
 
 router = APIRouter()
 
 
-@router.post("/schedule", response_model=APIResponse)
+@router.post(
+    "/schedule",
+    response_model=APIResponse,
+    dependencies=[Depends(read_your_writes)]
+)
 async def schedule_income_distribution(
     request: IncomeDistributionRequest,
     db: Session = Depends(get_db),
@@ -96,19 +103,21 @@ async def list_income_distributions(
     status_filter: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List income distributions"""
     try:
-        query = db.query(IncomeDistribution).join(Asset)
+        query = select(IncomeDistribution).join(Asset).options(
+            selectinload(IncomeDistribution.asset)
+        )
         
         if asset_id:
-            query = query.filter(IncomeDistribution.asset_id == asset_id)
+            query = query.where(IncomeDistribution.asset_id == asset_id)
         
         if status_filter:
-            query = query.filter(IncomeDistribution.status == status_filter)
+            query = query.where(IncomeDistribution.status == status_filter)
         
-        distributions = query.offset(skip).limit(limit).all()
+        distributions = (await db.scalars(query.offset(skip).limit(limit))).all()
         
         distributions_data = []
         for dist in distributions:
@@ -137,13 +146,15 @@ async def list_income_distributions(
 @router.get("/distributions/{distribution_id}", response_model=APIResponse)
 async def get_distribution_details(
     distribution_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get detailed information about a specific distribution"""
     try:
-        distribution = db.query(IncomeDistribution).filter(
-            IncomeDistribution.id == distribution_id
-        ).first()
+        distribution = await db.scalar(
+            select(IncomeDistribution).options(
+                selectinload(IncomeDistribution.asset)
+            ).where(IncomeDistribution.id == distribution_id)
+        )
         
         if not distribution:
             raise HTTPException(
@@ -152,9 +163,11 @@ async def get_distribution_details(
             )
         
         # Get payouts for this distribution
-        payouts = db.query(IncomePayout).filter(
-            IncomePayout.distribution_id == distribution_id
-        ).join(User).all()
+        payouts = (await db.scalars(
+            select(IncomePayout).join(User).options(
+                selectinload(IncomePayout.user)
+            ).where(IncomePayout.distribution_id == distribution_id)
+        )).all()
         
         payouts_data = []
         for payout in payouts:
@@ -171,7 +184,9 @@ async def get_distribution_details(
             "payouts": payouts_data,
             "total_payouts": len(payouts_data),
             "successful_payouts": len([p for p in payouts if p.status == "success"]),
-            "failed_payouts": len([p for p in payouts if p.status == "failed"])
+            "failed_payouts": len([p for p in payouts if p.status == "failed"]),
+            "in_flight_payouts": len([p for p in payouts if p.status in ("submitting", "submitted")]),
+            "payout_cursor": distribution.payout_cursor or 0
         }
         
         return APIResponse(
@@ -189,7 +204,11 @@ async def get_distribution_details(
         )
 
 
-@router.post("/distributions/{distribution_id}/execute", response_model=APIResponse)
+@router.post(
+    "/distributions/{distribution_id}/execute",
+    response_model=APIResponse,
+    dependencies=[Depends(read_your_writes)]
+)
 async def execute_distribution_now(
     distribution_id: int,
     db: Session = Depends(get_db),
@@ -220,9 +239,8 @@ async def execute_distribution_now(
                 detail="Distribution is not in scheduled status"
             )
         
-        # Execute distribution via scheduler
-        from services.scheduler import scheduler
-        await scheduler._execute_income_distribution(distribution_id)
+        # Execute distribution on the scheduler's event loop
+        await scheduler.run_now("_execute_income_distribution", distribution_id)
         
         # Refresh distribution status
         db.refresh(distribution)
@@ -245,6 +263,64 @@ async def execute_distribution_now(
         )
 
 
+@router.post(
+    "/distributions/{distribution_id}/resume",
+    response_model=APIResponse,
+    dependencies=[Depends(read_your_writes)]
+)
+async def resume_distribution(
+    distribution_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Resume an interrupted or partially failed income distribution"""
+    try:
+        distribution = db.query(IncomeDistribution).filter(
+            IncomeDistribution.id == distribution_id
+        ).first()
+        
+        if not distribution:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Distribution not found"
+            )
+        
+        # Verify user is the asset creator
+        if distribution.asset.creator_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only asset creator can resume distributions"
+            )
+        
+        if distribution.status not in RESUMABLE_STATUSES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Distribution cannot be resumed from its current status"
+            )
+        
+        await scheduler.run_now("_execute_income_distribution", distribution_id, True)
+        
+        # Refresh distribution status
+        db.refresh(distribution)
+        
+        return APIResponse(
+            success=True,
+            message="Distribution resumed",
+            data={
+                "distribution_id": distribution_id,
+                "status": distribution.status
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
 @router.get("/payouts/user/{wallet_id}", response_model=APIResponse)
 async def get_user_payouts(
     wallet_id: str,
@@ -302,11 +378,11 @@ async def get_user_payouts(
 @router.get("/analytics/asset/{asset_id}", response_model=APIResponse)
 async def get_asset_income_analytics(
     asset_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get income analytics for an asset"""
     try:
-        asset = db.query(Asset).filter(Asset.id == asset_id).first()
+        asset = await db.get(Asset, asset_id)
         
         if not asset:
             raise HTTPException(
@@ -314,40 +390,19 @@ async def get_asset_income_analytics(
                 detail="Asset not found"
             )
         
-        # Get all distributions for this asset
-        distributions = db.query(IncomeDistribution).filter(
-            IncomeDistribution.asset_id == asset_id
-        ).all()
-        
-        # Calculate analytics
-        total_distributed = sum(
-            dist.total_income for dist in distributions 
-            if dist.status == "completed"
-        )
-        
-        total_scheduled = sum(
-            dist.total_income for dist in distributions 
-            if dist.status == "scheduled"
-        )
-        
-        # Get token holders
-        holdings = db.query(Holding).filter(
-            Holding.asset_id == asset_id
-        ).all()
+        # Totals are maintained incrementally, so this is a primary key lookup
+        rollup = await db.get(AssetIncomeRollup, asset_id)
+        analytics = income_rollups.analytics(rollup)
         
         analytics_data = {
             "asset_id": asset_id,
             "asset_name": asset.name,
             "asset_valuation": asset.valuation,
             "total_supply": asset.total_supply,
-            "tokens_in_circulation": sum(holding.amount for holding in holdings),
-            "total_holders": len(holdings),
-            "total_distributions": len(distributions),
-            "completed_distributions": len([d for d in distributions if d.status == "completed"]),
-            "total_income_distributed": total_distributed,
-            "total_income_scheduled": total_scheduled,
-            "average_distribution": total_distributed / len(distributions) if distributions else 0,
-            "yield_percentage": (total_distributed / asset.valuation * 100) if asset.valuation > 0 else 0
+            **analytics,
+            "yield_percentage": (
+                analytics["total_income_distributed"] / asset.valuation * 100
+            ) if asset.valuation > 0 else 0
         }
         
         return APIResponse(
@@ -379,7 +434,9 @@ async def get_scheduled_jobs(
             data={
                 "jobs": jobs,
                 "total": len(jobs),
-                "scheduler_running": scheduler.running
+                "scheduler_running": scheduler.running,
+                "scheduler_leader": scheduler.is_leader,
+                "distribution_catchup": scheduler.catchup_stats
             }
         )
         
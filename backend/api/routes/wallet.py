@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Dict, Any
 
-from database.database import get_db
+from database.database import get_db, read_your_writes
 from models.models import User
 from schemas.schemas import (
     WalletCreateRequest, WalletCreateResponse, UserResponse, APIResponse
@@ -17,7 +17,11 @@ from utils.auth import get_current_user
 router = APIRouter()
 
 
-@router.post("/create", response_model=APIResponse)
+@router.post(
+    "/create",
+    response_model=APIResponse,
+    dependencies=[Depends(read_your_writes)]
+)
 async def create_sponsored_wallet(
     request: WalletCreateRequest,
     db: Session = Depends(get_db)
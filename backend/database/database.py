@@ -2,20 +2,135 @@
 Database configuration and session management
 """
 
-from sqlalchemy import create_engine
+import itertools
+import time
+from typing import Any, Dict
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from utils.config import settings
 
+
+def is_sqlite(url: str) -> bool:
+    """Check whether a database URL points at SQLite"""
+    return url.startswith("sqlite")
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Build pool options for an engine on `url`"""
+    options: Dict[str, Any] = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    # In-memory SQLite databases live in a single connection, so they keep
+    # SQLAlchemy's default pool
+    if not (is_sqlite(url) and ":memory:" in url):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enable WAL journaling and tune locking and I/O on a new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Report connection pool usage for an engine"""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    return stats
+
+
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if is_sqlite(settings.DATABASE_URL) else {},
+    **engine_options(settings.DATABASE_URL)
 )
+if is_sqlite(settings.DATABASE_URL):
+    event.listen(engine, "connect", apply_sqlite_pragmas)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for each supported sync database URL scheme
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+# Clients that wrote recently send this back to keep reading from the primary
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a database URL for its asyncio equivalent"""
+    scheme, separator, rest = url.partition("://")
+    driver = ASYNC_DRIVERS.get(scheme.split("+")[0])
+    return f"{driver}{separator}{rest}" if driver else url
+
+
+def create_async_db_engine(url: str):
+    """Create an async engine with the configured pool and SQLite pragmas"""
+    options = engine_options(url)
+    if "pool_size" in options and is_sqlite(url):
+        # aiosqlite defaults to NullPool, which takes no sizing options
+        options["poolclass"] = AsyncAdaptedQueuePool
+    db_engine = create_async_engine(url, **options)
+    if is_sqlite(url):
+        event.listen(db_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    return db_engine
+
+
+def async_session_factory(bind) -> async_sessionmaker:
+    """Create an async session factory; objects stay readable after commit"""
+    return async_sessionmaker(bind, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+# Create async SQLAlchemy engine for non-blocking request handlers
+async_engine = create_async_db_engine(
+    settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL)
+)
+
+# Create AsyncSessionLocal class
+AsyncSessionLocal = async_session_factory(async_engine)
+
+# Create read replica engines, used round-robin by read-only dependencies
+replica_engines = [
+    create_async_db_engine(to_async_url(url.strip()))
+    for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()
+]
+ReplicaSessionLocals = itertools.cycle(
+    [async_session_factory(replica_engine) for replica_engine in replica_engines]
+    or [AsyncSessionLocal]
+)
+
 # Create Base class
 Base = declarative_base()
 
@@ -27,3 +142,39 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Check whether a client is inside its read-your-writes window"""
+    value = request.headers.get(READ_PRIMARY_HEADER) or request.cookies.get(READ_PRIMARY_COOKIE)
+    try:
+        return float(value) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+async def get_read_db(request: Request):
+    """Dependency to get an async session for read-only queries, on a replica when configured"""
+    session_factory = AsyncSessionLocal if reads_from_primary(request) else next(ReplicaSessionLocals)
+    async with session_factory() as db:
+        yield db
+
+
+def read_your_writes(response: Response):
+    """Dependency for mutating routes: pin the client's reads to the primary for a while
+    
+    Replicas lag the primary, so without this a client could fail to see its
+    own write on the next request.
+    """
+    until = f"{time.time() + settings.READ_YOUR_WRITES_WINDOW:.3f}"
+    response.headers[READ_PRIMARY_HEADER] = until
+    response.set_cookie(
+        READ_PRIMARY_COOKIE, until,
+        max_age=max(1, int(settings.READ_YOUR_WRITES_WINDOW)), httponly=True, samesite="lax"
+    )
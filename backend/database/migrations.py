@@ -0,0 +1,79 @@
+"""
+Schema migrations, applied with Alembic
+"""
+
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, pool, text
+from sqlalchemy.engine import Connection
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+# Revision matching the schema that `create_all` used to build at startup
+BASELINE_REVISION = "0001"
+
+# Arbitrary application-wide key for the PostgreSQL advisory lock held while migrating
+MIGRATION_LOCK_KEY = 4172650318
+
+# Tables other libraries create and manage themselves, e.g. APScheduler's job store
+EXTERNAL_TABLES = {"scheduler_jobs"}
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    """Build an Alembic config for `url` (default: DATABASE_URL)"""
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    # ConfigParser treats '%' as interpolation, e.g. in URL-encoded passwords
+    config.set_main_option("sqlalchemy.url", (url or settings.DATABASE_URL).replace("%", "%%"))
+    return config
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Keep external tables out of autogenerate, so it neither drops nor recreates them"""
+    return not (type_ == "table" and name in EXTERNAL_TABLES)
+
+
+@contextmanager
+def migration_lock(connection: Connection) -> Iterator[None]:
+    """Hold a database-wide lock so concurrently starting workers migrate one at a time"""
+    if connection.dialect.name != "postgresql":
+        # Other backends have no advisory locks; see DB_AUTO_MIGRATE
+        yield
+        return
+    
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    connection.commit()
+    try:
+        yield
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        connection.commit()
+
+
+def upgrade_database(url: Optional[str] = None, revision: str = "head"):
+    """Migrate a database to `revision`, adopting databases created before migrations existed"""
+    config = alembic_config(url)
+    db_engine = create_engine(url or settings.DATABASE_URL, poolclass=pool.NullPool)
+    try:
+        with db_engine.connect() as connection, migration_lock(connection):
+            # Workers that waited for the lock see the schema the holder left behind
+            tables = set(inspect(connection).get_table_names())
+            connection.commit()
+            config.attributes["connection"] = connection
+            
+            if "alembic_version" not in tables and "users" in tables:
+                logger.info(f"Adopting existing database schema at revision {BASELINE_REVISION}")
+                command.stamp(config, BASELINE_REVISION)
+            
+            command.upgrade(config, revision)
+            connection.commit()
+    finally:
+        db_engine.dispose()
@@ -12,22 +12,24 @@ from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 from api.routes import wallet, kyc, assets, rewards, mirror
-from database.database import engine, Base
+from database.database import engine, async_engine, replica_engines, pool_stats
+from database.migrations import upgrade_database
+from services.mirror_service import mirror_service
 from services.scheduler import scheduler
 from utils.config import settings
 
 # Load environment variables
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
     print("🚀 Starting AssetFraction Backend...")
+    if settings.DB_AUTO_MIGRATE:
+        upgrade_database()
+        print("🗄️ Database schema up to date")
     scheduler.start()
     print("📅 Scheduler started")
     
@@ -37,6 +39,10 @@ async def lifespan(app: FastAPI):
     print("🛑 Shutting down AssetFraction Backend...")
     scheduler.shutdown()
     print("📅 Scheduler stopped")
+    await mirror_service.close()
+    await async_engine.dispose()
+    for replica_engine in replica_engines:
+        await replica_engine.dispose()
 
 
 # Initialize FastAPI app
@@ -89,7 +95,11 @@ async def health_check():
     return {
         "status": "healthy",
         "database": "connected",
-        "scheduler": "running" if scheduler.running else "stopped"
+        "database_pool": pool_stats(engine),
+        "async_database_pool": pool_stats(async_engine.sync_engine),
+        "replica_pools": [pool_stats(replica_engine.sync_engine) for replica_engine in replica_engines],
+        "scheduler": "running" if scheduler.running else "stopped",
+        "scheduler_leader": scheduler.is_leader
     }
 
 
@@ -0,0 +1,130 @@
+"""Initial schema: users, assets, holdings, transactions, income and KYC
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("wallet_id", sa.String(), nullable=False),
+        sa.Column("public_key", sa.String(), nullable=False),
+        sa.Column("private_key_encrypted", sa.Text(), nullable=True),
+        sa.Column("kyc_verified", sa.Boolean(), nullable=True),
+        sa.Column("kyc_hash", sa.String(), nullable=True),
+        sa.Column("phone_number", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_wallet_id", "users", ["wallet_id"], unique=True)
+
+    op.create_table(
+        "assets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("nft_id", sa.String(), nullable=False),
+        sa.Column("ft_id", sa.String(), nullable=False),
+        sa.Column("asset_type", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("location", sa.String(), nullable=True),
+        sa.Column("valuation", sa.Float(), nullable=False),
+        sa.Column("total_supply", sa.Integer(), nullable=True),
+        sa.Column("extra_data", sa.JSON(), nullable=True),
+        sa.Column("creator_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("royalty_percentage", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_assets_id", "assets", ["id"])
+    op.create_index("ix_assets_nft_id", "assets", ["nft_id"], unique=True)
+    op.create_index("ix_assets_ft_id", "assets", ["ft_id"], unique=True)
+
+    op.create_table(
+        "holdings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id"), nullable=False),
+        sa.Column("ft_id", sa.String(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("purchase_price", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_holdings_id", "holdings", ["id"])
+
+    op.create_table(
+        "transactions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("transaction_id", sa.String(), nullable=False),
+        sa.Column("transaction_type", sa.String(), nullable=False),
+        sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id"), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=True),
+        sa.Column("token_id", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("extra_data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_transactions_id", "transactions", ["id"])
+    op.create_index("ix_transactions_transaction_id", "transactions", ["transaction_id"], unique=True)
+
+    op.create_table(
+        "income_distributions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id"), nullable=False),
+        sa.Column("total_income", sa.Float(), nullable=False),
+        sa.Column("distribution_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("extra_data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_income_distributions_id", "income_distributions", ["id"])
+
+    op.create_table(
+        "income_payouts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("distribution_id", sa.Integer(), sa.ForeignKey("income_distributions.id"), nullable=False),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("transaction_id", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_income_payouts_id", "income_payouts", ["id"])
+
+    op.create_table(
+        "kyc_submissions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("document_hash", sa.String(), nullable=False),
+        sa.Column("document_type", sa.String(), nullable=False),
+        sa.Column("hcs_message_id", sa.String(), nullable=True),
+        sa.Column("verification_status", sa.String(), nullable=True),
+        sa.Column("submitted_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("verified_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_kyc_submissions_id", "kyc_submissions", ["id"])
+
+
+def downgrade():
+    for table in (
+        "kyc_submissions", "income_payouts", "income_distributions",
+        "transactions", "holdings", "assets", "users"
+    ):
+        op.drop_table(table)
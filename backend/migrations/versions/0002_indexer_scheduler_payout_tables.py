@@ -0,0 +1,141 @@
+"""Mirror index, scheduler lease, transaction proof and holder snapshot tables; payout checkpoints
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Databases created with `create_all` before migrations existed may already
+have some of these tables, so each table and column is only added if missing.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {col["name"] for col in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    if not _has_table("transaction_proofs"):
+        op.create_table(
+            "transaction_proofs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("transaction_id", sa.String(), nullable=False),
+            sa.Column("consensus_timestamp", sa.String(), nullable=True),
+            sa.Column("result", sa.String(), nullable=False),
+            sa.Column("transfers", sa.JSON(), nullable=True),
+            sa.Column("token_transfers", sa.JSON(), nullable=True),
+            sa.Column("verified_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index("ix_transaction_proofs_id", "transaction_proofs", ["id"])
+        op.create_index("ix_transaction_proofs_transaction_id", "transaction_proofs",
+                        ["transaction_id"], unique=True)
+
+    if not _has_table("mirror_transactions"):
+        op.create_table(
+            "mirror_transactions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("account_id", sa.String(), nullable=False),
+            sa.Column("transaction_id", sa.String(), nullable=False),
+            sa.Column("consensus_timestamp", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("result", sa.String(), nullable=True),
+            sa.Column("data", sa.JSON(), nullable=False),
+            sa.Column("synced_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.UniqueConstraint("account_id", "transaction_id", "consensus_timestamp",
+                                name="uq_mirror_tx_account_tx"),
+        )
+        op.create_index("ix_mirror_transactions_id", "mirror_transactions", ["id"])
+        op.create_index("ix_mirror_transactions_transaction_id", "mirror_transactions", ["transaction_id"])
+        op.create_index("ix_mirror_tx_account_timestamp", "mirror_transactions",
+                        ["account_id", "consensus_timestamp"])
+
+    if not _has_table("mirror_transaction_tokens"):
+        op.create_table(
+            "mirror_transaction_tokens",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("mirror_transaction_id", sa.Integer(), sa.ForeignKey("mirror_transactions.id"),
+                      nullable=False),
+            sa.Column("token_id", sa.String(), nullable=False),
+        )
+        op.create_index("ix_mirror_transaction_tokens_id", "mirror_transaction_tokens", ["id"])
+        op.create_index("ix_mirror_tx_token_token", "mirror_transaction_tokens",
+                        ["token_id", "mirror_transaction_id"])
+
+    if not _has_table("mirror_sync_checkpoints"):
+        op.create_table(
+            "mirror_sync_checkpoints",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("scope", sa.String(), nullable=False),
+            sa.Column("entity_id", sa.String(), nullable=False),
+            sa.Column("last_consensus_timestamp", sa.String(), nullable=True),
+            sa.Column("last_synced_at", sa.DateTime(timezone=True), nullable=True),
+            sa.UniqueConstraint("scope", "entity_id", name="uq_mirror_checkpoint_entity"),
+        )
+        op.create_index("ix_mirror_sync_checkpoints_id", "mirror_sync_checkpoints", ["id"])
+
+    if not _has_table("scheduler_leases"):
+        op.create_table(
+            "scheduler_leases",
+            sa.Column("name", sa.String(), primary_key=True),
+            sa.Column("holder", sa.String(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("acquired_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+
+    if not _has_table("holder_snapshots"):
+        op.create_table(
+            "holder_snapshots",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id"), nullable=False),
+            sa.Column("holder_count", sa.Integer(), nullable=False),
+            sa.Column("total_amount", sa.Float(), nullable=False),
+            sa.Column("is_current", sa.Boolean(), nullable=True),
+            sa.Column("taken_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index("ix_holder_snapshots_id", "holder_snapshots", ["id"])
+        op.create_index("ix_holder_snapshot_asset_current", "holder_snapshots", ["asset_id", "is_current"])
+
+    if not _has_table("holder_snapshot_entries"):
+        op.create_table(
+            "holder_snapshot_entries",
+            sa.Column("snapshot_id", sa.Integer(), sa.ForeignKey("holder_snapshots.id"), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+            sa.Column("amount", sa.Float(), nullable=False),
+        )
+
+    with op.batch_alter_table("income_distributions") as batch:
+        if not _has_column("income_distributions", "payout_cursor"):
+            batch.add_column(sa.Column("payout_cursor", sa.Integer(), nullable=True))
+        if not _has_column("income_distributions", "snapshot_id"):
+            batch.add_column(sa.Column("snapshot_id", sa.Integer(), nullable=True))
+            batch.create_foreign_key(
+                "fk_income_distributions_snapshot_id", "holder_snapshots", ["snapshot_id"], ["id"]
+            )
+
+    if not _has_column("income_payouts", "idempotency_key"):
+        op.add_column("income_payouts", sa.Column("idempotency_key", sa.String(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("income_payouts", "idempotency_key")
+    with op.batch_alter_table("income_distributions") as batch:
+        batch.drop_constraint("fk_income_distributions_snapshot_id", type_="foreignkey")
+        batch.drop_column("snapshot_id")
+        batch.drop_column("payout_cursor")
+    for table in (
+        "holder_snapshot_entries", "holder_snapshots", "scheduler_leases",
+        "mirror_sync_checkpoints", "mirror_transaction_tokens", "mirror_transactions",
+        "transaction_proofs"
+    ):
+        op.drop_table(table)
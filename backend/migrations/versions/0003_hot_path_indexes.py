@@ -0,0 +1,35 @@
+"""Composite indexes for hot holding, payout, distribution, KYC and transaction queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns, unique)
+INDEXES = [
+    ("ix_holdings_asset_amount", "holdings", ["asset_id", "amount"], False),
+    ("ix_holdings_user_asset", "holdings", ["user_id", "asset_id"], False),
+    ("ix_income_payouts_distribution_status", "income_payouts", ["distribution_id", "status"], False),
+    ("ix_income_payouts_user", "income_payouts", ["user_id"], False),
+    ("ix_income_payouts_idempotency_key", "income_payouts", ["idempotency_key"], True),
+    ("ix_income_distributions_status_date", "income_distributions", ["status", "distribution_date"], False),
+    ("ix_kyc_submissions_user_status", "kyc_submissions", ["user_id", "verification_status"], False),
+    ("ix_transactions_user_created", "transactions", ["user_id", "created_at"], False),
+]
+
+
+def upgrade():
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade():
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,38 @@
+"""Unique holding per (user_id, asset_id)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Concurrent transfers could insert duplicate holding rows for the same user
+and asset, so those are merged into the oldest row before the constraint is
+added.
+"""
+
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        UPDATE holdings SET amount = (
+            SELECT SUM(h.amount) FROM holdings h
+            WHERE h.user_id = holdings.user_id AND h.asset_id = holdings.asset_id
+        )
+        WHERE id IN (SELECT MIN(id) FROM holdings GROUP BY user_id, asset_id HAVING COUNT(*) > 1)
+    """)
+    op.execute("""
+        DELETE FROM holdings
+        WHERE id NOT IN (SELECT MIN(id) FROM holdings GROUP BY user_id, asset_id)
+    """)
+    op.drop_index("ix_holdings_user_asset", table_name="holdings")
+    op.create_index("uq_holdings_user_asset", "holdings", ["user_id", "asset_id"], unique=True)
+
+
+def downgrade():
+    op.drop_index("uq_holdings_user_asset", table_name="holdings")
+    op.create_index("ix_holdings_user_asset", "holdings", ["user_id", "asset_id"])
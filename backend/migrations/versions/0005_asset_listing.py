@@ -0,0 +1,34 @@
+"""Keyset pagination indexes and per-type counters for the asset listing
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "asset_type_counts",
+        sa.Column("asset_type", sa.String(), primary_key=True),
+        sa.Column("asset_count", sa.Integer(), nullable=False),
+    )
+    op.execute("""
+        INSERT INTO asset_type_counts (asset_type, asset_count)
+        SELECT asset_type, COUNT(*) FROM assets GROUP BY asset_type
+    """)
+    op.create_index("ix_assets_created_id", "assets", ["created_at", "id"])
+    op.create_index("ix_assets_type_created_id", "assets", ["asset_type", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_assets_type_created_id", table_name="assets")
+    op.drop_index("ix_assets_created_id", table_name="assets")
+    op.drop_table("asset_type_counts")
@@ -0,0 +1,26 @@
+"""Holder concentration on snapshots and an index for ranked holder pages
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("holder_snapshots", sa.Column("herfindahl_index", sa.Float(), nullable=True))
+    op.create_index("ix_holder_snapshot_entries_amount", "holder_snapshot_entries",
+                    ["snapshot_id", "amount", "user_id"])
+
+
+def downgrade():
+    op.drop_index("ix_holder_snapshot_entries_amount", table_name="holder_snapshot_entries")
+    with op.batch_alter_table("holder_snapshots") as batch:
+        batch.drop_column("herfindahl_index")
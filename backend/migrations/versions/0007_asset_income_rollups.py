@@ -0,0 +1,50 @@
+"""Per-asset income analytics rollups
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "asset_income_rollups",
+        sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id"), primary_key=True),
+        sa.Column("distribution_count", sa.Integer(), nullable=False),
+        sa.Column("completed_count", sa.Integer(), nullable=False),
+        sa.Column("distributed_total", sa.Float(), nullable=False),
+        sa.Column("scheduled_total", sa.Float(), nullable=False),
+        sa.Column("holder_count", sa.Integer(), nullable=False),
+        sa.Column("circulating_supply", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.execute("""
+        INSERT INTO asset_income_rollups (
+            asset_id, distribution_count, completed_count, distributed_total, scheduled_total,
+            holder_count, circulating_supply
+        )
+        SELECT
+            assets.id,
+            (SELECT COUNT(*) FROM income_distributions d WHERE d.asset_id = assets.id),
+            (SELECT COUNT(*) FROM income_distributions d
+             WHERE d.asset_id = assets.id AND d.status = 'completed'),
+            COALESCE((SELECT SUM(d.total_income) FROM income_distributions d
+                      WHERE d.asset_id = assets.id AND d.status = 'completed'), 0),
+            COALESCE((SELECT SUM(d.total_income) FROM income_distributions d
+                      WHERE d.asset_id = assets.id AND d.status = 'scheduled'), 0),
+            (SELECT COUNT(*) FROM holdings h WHERE h.asset_id = assets.id AND h.amount > 0),
+            COALESCE((SELECT SUM(h.amount) FROM holdings h WHERE h.asset_id = assets.id AND h.amount > 0), 0)
+        FROM assets
+    """)
+
+
+def downgrade():
+    op.drop_table("asset_income_rollups")
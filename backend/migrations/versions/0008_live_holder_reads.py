@@ -0,0 +1,43 @@
+"""Serve holder aggregates and rankings from live holdings
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+Asset reads no longer take holder snapshots, so the ranked-page index moves
+from holder_snapshot_entries to holdings, and the income rollup keeps the
+sum of squared balances that the concentration index is derived from.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "asset_income_rollups",
+        sa.Column("holding_square_sum", sa.Float(), nullable=False, server_default="0")
+    )
+    op.execute("""
+        UPDATE asset_income_rollups SET holding_square_sum = COALESCE((
+            SELECT SUM(h.amount * h.amount) FROM holdings h
+            WHERE h.asset_id = asset_income_rollups.asset_id AND h.amount > 0
+        ), 0)
+    """)
+    op.drop_index("ix_holdings_asset_amount", table_name="holdings")
+    op.create_index("ix_holdings_asset_amount_user", "holdings", ["asset_id", "amount", "user_id"])
+    op.drop_index("ix_holder_snapshot_entries_amount", table_name="holder_snapshot_entries")
+
+
+def downgrade():
+    op.create_index("ix_holder_snapshot_entries_amount", "holder_snapshot_entries",
+                    ["snapshot_id", "amount", "user_id"])
+    op.drop_index("ix_holdings_asset_amount_user", table_name="holdings")
+    op.create_index("ix_holdings_asset_amount", "holdings", ["asset_id", "amount"])
+    with op.batch_alter_table("asset_income_rollups") as batch:
+        batch.drop_column("holding_square_sum")
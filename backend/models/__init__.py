@@ -5,10 +5,15 @@ Contains all SQLAlchemy ORM models for the application
 
 from .models import (
     User, Asset, Holding, Transaction, IncomeDistribution, 
-    IncomePayout, KYCSubmission
+    IncomePayout, KYCSubmission, TransactionProof, MirrorTransaction,
+    MirrorTransactionToken, MirrorSyncCheckpoint, SchedulerLease, HolderSnapshot,
+    HolderSnapshotEntry, AssetTypeCount, AssetIncomeRollup
 )
 
 __all__ = [
     "User", "Asset", "Holding", "Transaction", 
-    "IncomeDistribution", "IncomePayout", "KYCSubmission"
+    "IncomeDistribution", "IncomePayout", "KYCSubmission", "TransactionProof",
+    "MirrorTransaction", "MirrorTransactionToken", "MirrorSyncCheckpoint",
+    "SchedulerLease", "HolderSnapshot", "HolderSnapshotEntry",
+    "AssetTypeCount", "AssetIncomeRollup"
 ]
@@ -2,7 +2,10 @@
 SQLAlchemy models for AssetFraction Backend
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, JSON, Text, ForeignKey
+from sqlalchemy import (
+    Column, Integer, String, Boolean, Float, DateTime, JSON, Text, ForeignKey,
+    Index, UniqueConstraint
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.database import Base
@@ -32,6 +35,10 @@ class User(Base):
 class Asset(Base):
     """Asset model for tokenized real estate and art"""
     __tablename__ = "assets"
+    __table_args__ = (
+        Index("ix_assets_created_id", "created_at", "id"),
+        Index("ix_assets_type_created_id", "asset_type", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nft_id = Column(String, unique=True, index=True, nullable=False)  # Hedera NFT ID
@@ -57,6 +64,10 @@ class Asset(Base):
 class Holding(Base):
     """Token holdings for users"""
     __tablename__ = "holdings"
+    __table_args__ = (
+        Index("ix_holdings_asset_amount_user", "asset_id", "amount", "user_id"),
+        Index("uq_holdings_user_asset", "user_id", "asset_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -75,6 +86,9 @@ class Holding(Base):
 class Transaction(Base):
     """Transaction history"""
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -95,12 +109,17 @@ class Transaction(Base):
 class IncomeDistribution(Base):
     """Income distribution records"""
     __tablename__ = "income_distributions"
+    __table_args__ = (
+        Index("ix_income_distributions_status_date", "status", "distribution_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False)
     total_income = Column(Float, nullable=False)  # Total income to distribute
     distribution_date = Column(DateTime(timezone=True), nullable=False)
     status = Column(String, default="scheduled")  # 'scheduled', 'processing', 'completed', 'failed'
+    payout_cursor = Column(Integer, default=0)  # Every payout with id <= cursor has settled
+    snapshot_id = Column(Integer, ForeignKey("holder_snapshots.id"), nullable=True)  # Holders the payouts were computed from
     extra_data = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -108,18 +127,25 @@ class IncomeDistribution(Base):
     # Relationships
     asset = relationship("Asset", back_populates="income_distributions")
     payouts = relationship("IncomePayout", back_populates="distribution")
+    snapshot = relationship("HolderSnapshot")
 
 
 class IncomePayout(Base):
     """Individual income payouts to token holders"""
     __tablename__ = "income_payouts"
+    __table_args__ = (
+        Index("ix_income_payouts_distribution_status", "distribution_id", "status"),
+        Index("ix_income_payouts_user", "user_id"),
+        Index("ix_income_payouts_idempotency_key", "idempotency_key", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     distribution_id = Column(Integer, ForeignKey("income_distributions.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     amount = Column(Float, nullable=False)  # Amount paid to user
-    transaction_id = Column(String, nullable=True)  # Hedera TX ID
-    status = Column(String, default="pending")  # 'pending', 'success', 'failed'
+    transaction_id = Column(String, nullable=True)  # Hedera TX ID, pinned before submission
+    idempotency_key = Column(String, nullable=True)  # '<distribution_id>:<user_id>', unique
+    status = Column(String, default="pending")  # 'pending', 'submitting', 'submitted', 'success', 'failed'
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -128,9 +154,25 @@ class IncomePayout(Base):
     user = relationship("User")
 
 
+class TransactionProof(Base):
+    """Verified Mirror Node records for payout transactions"""
+    __tablename__ = "transaction_proofs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    transaction_id = Column(String, unique=True, index=True, nullable=False)  # Hedera TX ID
+    consensus_timestamp = Column(String, nullable=True)
+    result = Column(String, nullable=False)  # Mirror Node result code, e.g. 'SUCCESS'
+    transfers = Column(JSON, nullable=True)
+    token_transfers = Column(JSON, nullable=True)
+    verified_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class KYCSubmission(Base):
     """KYC submission records"""
     __tablename__ = "kyc_submissions"
+    __table_args__ = (
+        Index("ix_kyc_submissions_user_status", "user_id", "verification_status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -143,3 +185,120 @@ class KYCSubmission(Base):
     
     # Relationships
     user = relationship("User")
+
+
+class MirrorTransaction(Base):
+    """Local index of Mirror Node transactions for tracked accounts"""
+    __tablename__ = "mirror_transactions"
+    __table_args__ = (
+        UniqueConstraint("account_id", "transaction_id", "consensus_timestamp",
+                         name="uq_mirror_tx_account_tx"),
+        Index("ix_mirror_tx_account_timestamp", "account_id", "consensus_timestamp"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(String, nullable=False)  # Tracked account the record was synced for
+    transaction_id = Column(String, index=True, nullable=False)  # Mirror Node format (0.0.x-s-n)
+    consensus_timestamp = Column(String, nullable=False)  # "seconds.nanos", fixed width so it sorts lexically
+    name = Column(String, nullable=True)  # e.g. 'CRYPTOTRANSFER'
+    result = Column(String, nullable=True)  # e.g. 'SUCCESS'
+    data = Column(JSON, nullable=False)  # Raw Mirror Node record
+    synced_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    tokens = relationship("MirrorTransactionToken", back_populates="transaction",
+                          cascade="all, delete-orphan")
+
+
+class MirrorTransactionToken(Base):
+    """Tokens moved by an indexed Mirror Node transaction"""
+    __tablename__ = "mirror_transaction_tokens"
+    __table_args__ = (
+        Index("ix_mirror_tx_token_token", "token_id", "mirror_transaction_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    mirror_transaction_id = Column(Integer, ForeignKey("mirror_transactions.id"), nullable=False)
+    token_id = Column(String, nullable=False)
+    
+    # Relationships
+    transaction = relationship("MirrorTransaction", back_populates="tokens")
+
+
+class MirrorSyncCheckpoint(Base):
+    """Last indexed consensus timestamp per tracked Mirror Node entity"""
+    __tablename__ = "mirror_sync_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("scope", "entity_id", name="uq_mirror_checkpoint_entity"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String, nullable=False)  # 'account'
+    entity_id = Column(String, nullable=False)  # Hedera account ID
+    last_consensus_timestamp = Column(String, nullable=True)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class SchedulerLease(Base):
+    """Lease-based leader lock shared by all API workers"""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String, primary_key=True)  # Lock name, e.g. 'scheduler'
+    holder = Column(String, nullable=False)  # host:pid:nonce of the current leader
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    acquired_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class HolderSnapshot(Base):
+    """Frozen copy of an asset's token holders at a point in time"""
+    __tablename__ = "holder_snapshots"
+    __table_args__ = (
+        Index("ix_holder_snapshot_asset_current", "asset_id", "is_current"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False)
+    holder_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)  # Tokens in circulation
+    herfindahl_index = Column(Float, nullable=True)  # Sum of squared holder shares, 1.0 for a single holder
+    is_current = Column(Boolean, default=True)  # False once holdings have changed since
+    taken_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    entries = relationship("HolderSnapshotEntry", back_populates="snapshot",
+                           cascade="all, delete-orphan")
+
+
+class HolderSnapshotEntry(Base):
+    """One holder's balance within a holder snapshot"""
+    __tablename__ = "holder_snapshot_entries"
+    
+    snapshot_id = Column(Integer, ForeignKey("holder_snapshots.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    amount = Column(Float, nullable=False)
+    
+    # Relationships
+    snapshot = relationship("HolderSnapshot", back_populates="entries")
+
+
+class AssetTypeCount(Base):
+    """Maintained number of assets per asset type"""
+    __tablename__ = "asset_type_counts"
+    
+    asset_type = Column(String, primary_key=True)
+    asset_count = Column(Integer, nullable=False, default=0)
+
+
+class AssetIncomeRollup(Base):
+    """Running per-asset income and holding totals behind the analytics endpoint"""
+    __tablename__ = "asset_income_rollups"
+    
+    asset_id = Column(Integer, ForeignKey("assets.id"), primary_key=True)
+    distribution_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    distributed_total = Column(Float, nullable=False, default=0.0)  # Income of completed distributions
+    scheduled_total = Column(Float, nullable=False, default=0.0)  # Income of distributions still scheduled
+    holder_count = Column(Integer, nullable=False, default=0)
+    circulating_supply = Column(Float, nullable=False, default=0.0)  # Tokens held by users
+    holding_square_sum = Column(Float, nullable=False, default=0.0)  # Sum of squared holder balances
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
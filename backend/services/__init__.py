@@ -5,6 +5,7 @@ Contains all business logic services and external integrations
 
 from .hedera_service import hedera_service
 from .mirror_service import mirror_service
+from .mirror_indexer import mirror_indexer
 from .scheduler import scheduler
 
-__all__ = ["hedera_service", "mirror_service", "scheduler"]
+__all__ = ["hedera_service", "mirror_service", "mirror_indexer", "scheduler"]
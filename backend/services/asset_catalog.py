@@ -0,0 +1,61 @@
+"""
+Asset listing: keyset cursors and maintained per-type totals
+"""
+
+from typing import Optional
+
+from sqlalchemy import Select, select, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from database.database import UPSERT_INSERTS
+from models.models import Asset, AssetTypeCount
+from utils.cursors import decode_cursor, encode_cursor
+
+
+class AssetCatalog:
+    """Pages through assets newest first by (created_at, id)
+    
+    Cursors carry only the id of the last asset on a page; its created_at is
+    compared inside the database, so the keyset never round-trips timestamps
+    through drivers that store them in different text formats.
+    """
+    
+    def page_query(self, asset_type: Optional[str], cursor: Optional[str], limit: int) -> Select:
+        """Select one page of assets plus a look-ahead row"""
+        query = select(Asset)
+        if asset_type:
+            query = query.where(Asset.asset_type == asset_type)
+        
+        if cursor:
+            after_id = decode_cursor(cursor, id=int)["id"]
+            after_created_at = select(Asset.created_at).where(Asset.id == after_id).scalar_subquery()
+            query = query.where(tuple_(Asset.created_at, Asset.id) < tuple_(after_created_at, after_id))
+        
+        return query.order_by(Asset.created_at.desc(), Asset.id.desc()).limit(limit + 1)
+    
+    @staticmethod
+    def next_cursor(asset: Asset) -> str:
+        """Build the cursor for the page after `asset`"""
+        return encode_cursor({"id": asset.id})
+    
+    def record_created(self, db: Session, asset_type: str):
+        """Count a new asset in its type's total, in the caller's transaction"""
+        insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+        statement = insert(AssetTypeCount).values(asset_type=asset_type, asset_count=1)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[AssetTypeCount.asset_type],
+            set_={"asset_count": AssetTypeCount.asset_count + 1}
+        ))
+    
+    @staticmethod
+    def total_query(asset_type: Optional[str] = None) -> Select:
+        """Select the number of assets, optionally of one type"""
+        query = select(func.coalesce(func.sum(AssetTypeCount.asset_count), 0))
+        if asset_type:
+            query = query.where(AssetTypeCount.asset_type == asset_type)
+        return query
+
+
+# Global asset catalog instance
+asset_catalog = AssetCatalog()
@@ -0,0 +1,77 @@
+"""
+Asset ownership reads: ranked holder pages and concentration from the rollup
+"""
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Select, select, tuple_
+
+from models.models import AssetIncomeRollup, Holding, User
+from utils.cursors import decode_cursor, encode_cursor
+
+
+class AssetHolders:
+    """Reads an asset's holders straight from live holdings
+    
+    Holder counts, circulation and squared balances come from the asset's
+    income rollup, so they are a primary key lookup. Ranked pages walk the
+    (asset_id, amount, user_id) index with keyset cursors, so even the last
+    page of a large asset only reads the rows it returns. Nothing here
+    writes; snapshots are left to distributions.
+    """
+    
+    def page_query(self, asset_id: int, limit: int, cursor: Optional[str] = None) -> Select:
+        """Select one page of an asset's holders, largest first, plus a look-ahead row"""
+        query = select(
+            Holding.user_id, User.wallet_id, Holding.amount, Holding.purchase_price
+        ).join(
+            User, User.id == Holding.user_id
+        ).where(Holding.asset_id == asset_id, Holding.amount > 0)
+        
+        if cursor:
+            position = decode_cursor(cursor, amount=(int, float), user_id=int)
+            query = query.where(
+                tuple_(Holding.amount, Holding.user_id) < tuple_(position["amount"], position["user_id"])
+            )
+        
+        return query.order_by(Holding.amount.desc(), Holding.user_id.desc()).limit(limit + 1)
+    
+    @staticmethod
+    def next_cursor(user_id: int, amount: float) -> str:
+        """Build the cursor for the holder page after the given holder"""
+        return encode_cursor({"amount": amount, "user_id": user_id})
+    
+    @staticmethod
+    def ownership(total_supply: int, rows) -> List[Dict[str, Any]]:
+        """Describe (user_id, wallet_id, amount, purchase_price) holder rows"""
+        return [
+            {
+                "wallet_id": wallet_id,
+                "tokens_held": amount,
+                "ownership_percentage": amount / total_supply * 100 if total_supply else 0.0,
+                "purchase_price": purchase_price
+            }
+            for _, wallet_id, amount, purchase_price in rows
+        ]
+    
+    @staticmethod
+    def totals(rollup: Optional[AssetIncomeRollup]) -> Dict[str, Any]:
+        """Get an asset's holder count and tokens in circulation"""
+        return {
+            "holder_count": rollup.holder_count if rollup else 0,
+            "tokens_in_circulation": rollup.circulating_supply if rollup else 0.0
+        }
+    
+    @staticmethod
+    def concentration(rollup: Optional[AssetIncomeRollup], top_amounts: List[float]) -> Dict[str, Any]:
+        """Describe how concentrated an asset's holdings are"""
+        total = rollup.circulating_supply if rollup else 0.0
+        return {
+            "largest_holder_share": top_amounts[0] / total if top_amounts and total else 0.0,
+            "top_holders_share": sum(top_amounts) / total if total else 0.0,
+            "herfindahl_index": rollup.holding_square_sum / total ** 2 if total else 0.0
+        }
+
+
+# Global asset holders instance
+asset_holders = AssetHolders()
@@ -4,15 +4,17 @@ Hedera SDK service for blockchain interactions
 
 import hashlib
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 from hedera import (
     Client, AccountCreateTransaction, AccountId, PrivateKey, PublicKey,
     TokenCreateTransaction, TokenType, TokenSupplyType, TokenMintTransaction,
     TransferTransaction, Hbar, TopicMessageSubmitTransaction, TopicId,
-    TokenAssociateTransaction, TokenId, NftId
+    TokenAssociateTransaction, TokenId, NftId, TransactionId, TransactionReceiptQuery, Status
 )
 from utils.config import settings
 
+TINYBARS_PER_HBAR = 100_000_000
+
 
 class HederaService:
     """Service for interacting with Hedera network"""
@@ -272,6 +274,86 @@ class HederaService:
                 "status": "failed"
             }
     
+    async def submit_batch_hbar_transfer(self, from_account: str,
+                                         recipients: List[Tuple[str, float]],
+                                         private_key: str,
+                                         transaction_id: Optional[str] = None) -> Dict[str, Any]:
+        """Submit one HBAR transfer paying several recipients, without waiting for its receipt
+        
+        Amounts are converted to tinybars so the sender debit matches the sum of
+        the credits exactly. Callers must respect `max_batch_recipients` and must
+        not repeat an account within one batch. A `transaction_id` from
+        `new_transaction_id` makes resubmission safe: the network executes a
+        given transaction ID at most once.
+        """
+        try:
+            from_acc = AccountId.from_string(from_account)
+            key = PrivateKey.from_string(private_key)
+            
+            transaction = TransferTransaction()
+            total_tinybars = 0
+            for to_account, amount in recipients:
+                tinybars = int(round(amount * TINYBARS_PER_HBAR))
+                total_tinybars += tinybars
+                transaction.add_hbar_transfer(
+                    AccountId.from_string(to_account), Hbar.from_tinybars(tinybars)
+                )
+            transaction.add_hbar_transfer(from_acc, Hbar.from_tinybars(-total_tinybars))
+            if transaction_id:
+                transaction.set_transaction_id(TransactionId.from_string(transaction_id))
+            
+            response = await transaction.freeze_with(self.client).sign(key).execute_async(self.client)
+            
+            return {
+                "transaction_id": response.transaction_id.to_string(),
+                "status": "submitted"
+            }
+            
+        except Exception as e:
+            return {
+                "error": str(e),
+                "status": "failed"
+            }
+    
+    @staticmethod
+    def new_transaction_id(payer_account: str) -> str:
+        """Generate a transaction ID for `payer_account`, valid from now"""
+        return TransactionId.generate(AccountId.from_string(payer_account)).to_string()
+    
+    @property
+    def max_batch_recipients(self) -> int:
+        """Recipients that fit in one transfer alongside the sender's debit"""
+        return max(1, settings.HEDERA_MAX_TRANSFERS_PER_TX - 1)
+    
+    async def get_transaction_receipt(self, transaction_id: str) -> Dict[str, Any]:
+        """Wait for the receipt of a previously submitted transaction
+        
+        The receipt query does not raise when consensus rejected the transfer,
+        so anything other than SUCCESS is reported as failed.
+        """
+        try:
+            receipt = await (
+                TransactionReceiptQuery()
+                .set_transaction_id(TransactionId.from_string(transaction_id))
+                .execute_async(self.client)
+            )
+            
+            result = {
+                "transaction_id": transaction_id,
+                "receipt_status": str(receipt.status),
+                "status": "success" if receipt.status == Status.SUCCESS else "failed"
+            }
+            if result["status"] == "failed":
+                result["error"] = f"Transaction reached consensus with status {receipt.status}"
+            return result
+            
+        except Exception as e:
+            return {
+                "transaction_id": transaction_id,
+                "error": str(e),
+                "status": "failed"
+            }
+    
     @staticmethod
     def generate_key_pair() -> Dict[str, str]:
         """Generate a new key pair"""
@@ -0,0 +1,122 @@
+"""
+Frozen per-asset holder snapshots behind distribution payouts and proofs
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from models.models import Holding, HolderSnapshot, HolderSnapshotEntry, IncomeDistribution, User
+
+logger = logging.getLogger(__name__)
+
+
+class HolderSnapshotService:
+    """Takes holder snapshots for distributions
+    
+    A snapshot is copied from `holdings` inside the database, so even large
+    assets are never loaded into Python to take one. Its holder count and
+    circulation are stored alongside, which makes them O(1) reads. Distributions
+    pin the snapshot their payouts were computed from; request handlers read
+    live holdings instead and never take one.
+    """
+    
+    def take(self, db: Session, asset_id: int) -> HolderSnapshot:
+        """Freeze the asset's current holder balances into a new snapshot"""
+        snapshot = HolderSnapshot(asset_id=asset_id, taken_at=datetime.utcnow())
+        db.add(snapshot)
+        db.flush()
+        
+        # Holder rows are summed per user so the snapshot has one entry each
+        db.execute(insert(HolderSnapshotEntry).from_select(
+            ["snapshot_id", "user_id", "amount"],
+            select(
+                literal(snapshot.id), Holding.user_id, func.sum(Holding.amount)
+            ).where(
+                Holding.asset_id == asset_id
+            ).group_by(Holding.user_id).having(func.sum(Holding.amount) > 0)
+        ))
+        
+        holder_count, total_amount, sum_of_squares = db.query(
+            func.count(HolderSnapshotEntry.user_id),
+            func.coalesce(func.sum(HolderSnapshotEntry.amount), 0.0),
+            func.coalesce(func.sum(HolderSnapshotEntry.amount * HolderSnapshotEntry.amount), 0.0)
+        ).filter(HolderSnapshotEntry.snapshot_id == snapshot.id).one()
+        snapshot.holder_count = holder_count
+        snapshot.total_amount = total_amount
+        snapshot.herfindahl_index = sum_of_squares / total_amount ** 2 if total_amount else 0.0
+        
+        self.mark_stale(db, asset_id, keep_id=snapshot.id)
+        self._prune(db, asset_id)
+        db.commit()
+        return snapshot
+    
+    def mark_stale(self, db: Session, asset_id: int, keep_id: Optional[int] = None):
+        """Stop serving an asset's current snapshot to reads; call when holdings change"""
+        query = db.query(HolderSnapshot).filter(
+            HolderSnapshot.asset_id == asset_id,
+            HolderSnapshot.is_current.is_(True)
+        )
+        if keep_id is not None:
+            query = query.filter(HolderSnapshot.id != keep_id)
+        query.update({HolderSnapshot.is_current: False}, synchronize_session=False)
+    
+    def _prune(self, db: Session, asset_id: int):
+        """Delete stale snapshots that no distribution refers to"""
+        pinned = select(IncomeDistribution.snapshot_id).where(
+            IncomeDistribution.snapshot_id.isnot(None)
+        )
+        stale_ids = [snapshot_id for (snapshot_id,) in db.query(HolderSnapshot.id).filter(
+            HolderSnapshot.asset_id == asset_id,
+            HolderSnapshot.is_current.is_(False),
+            HolderSnapshot.id.notin_(pinned)
+        )]
+        if not stale_ids:
+            return
+        
+        db.query(HolderSnapshotEntry).filter(
+            HolderSnapshotEntry.snapshot_id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+        db.query(HolderSnapshot).filter(
+            HolderSnapshot.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+    
+    def for_distribution(self, db: Session, distribution: IncomeDistribution) -> HolderSnapshot:
+        """Get the snapshot a distribution pays out from, freezing one on first use"""
+        if distribution.snapshot is not None:
+            return distribution.snapshot
+        
+        snapshot = self.take(db, distribution.asset_id)
+        distribution.snapshot_id = snapshot.id
+        db.commit()
+        logger.info(
+            f"📸 Froze {snapshot.holder_count} holders of asset {distribution.asset_id} "
+            f"for distribution {distribution.id}"
+        )
+        return snapshot
+    
+    def load_holders(self, db: Session, snapshot_id: int) -> List[Tuple[int, str, float]]:
+        """Get (user_id, wallet_id, amount) for every holder in a snapshot"""
+        return [
+            tuple(row) for row in db.query(
+                HolderSnapshotEntry.user_id, User.wallet_id, HolderSnapshotEntry.amount
+            ).join(
+                User, User.id == HolderSnapshotEntry.user_id
+            ).filter(HolderSnapshotEntry.snapshot_id == snapshot_id)
+        ]
+    
+    @staticmethod
+    def summary(snapshot: HolderSnapshot) -> Dict[str, Any]:
+        """Describe a snapshot without its entries"""
+        return {
+            "snapshot_id": snapshot.id,
+            "holder_count": snapshot.holder_count,
+            "tokens_in_circulation": snapshot.total_amount,
+            "taken_at": snapshot.taken_at
+        }
+
+
+# Global holder snapshot service instance
+holder_snapshots = HolderSnapshotService()
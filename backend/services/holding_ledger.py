@@ -0,0 +1,72 @@
+"""
+Atomic holding balance updates
+"""
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from database.database import UPSERT_INSERTS
+from models.models import Holding
+from services.income_rollups import income_rollups
+
+
+class HoldingLedger:
+    """Credits and debits holdings with SQL-side arithmetic
+    
+    Balances change through single INSERT ... ON CONFLICT DO UPDATE or UPDATE
+    statements keyed on the unique (user_id, asset_id) pair, so concurrent
+    transfers neither lose updates nor create duplicate holding rows. Each
+    change also moves the asset's income rollup by the holding's balance
+    before and after it, counting only positive holdings.
+    """
+    
+    def credit(self, db: Session, user_id: int, asset_id: int, ft_id: str, amount: float):
+        """Add tokens to a holding, creating it if needed"""
+        insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+        statement = insert(Holding).values(
+            user_id=user_id, asset_id=asset_id, ft_id=ft_id, amount=amount
+        )
+        balance = db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Holding.user_id, Holding.asset_id],
+                set_={"amount": Holding.amount + statement.excluded.amount, "updated_at": func.now()}
+            ).returning(Holding.amount)
+        ).scalar_one()
+        # A new holding starts from nothing, so this also covers the insert
+        self._record_change(db, asset_id, balance - amount, balance)
+    
+    def debit(self, db: Session, user_id: int, asset_id: int, amount: float):
+        """Remove tokens from a holding, deleting it once it is empty"""
+        balance = db.execute(
+            update(Holding).where(
+                Holding.user_id == user_id,
+                Holding.asset_id == asset_id
+            ).values(amount=Holding.amount - amount, updated_at=func.now()).returning(Holding.amount)
+        ).scalar_one_or_none()
+        if balance is None:
+            return
+        
+        db.execute(
+            delete(Holding).where(
+                Holding.user_id == user_id,
+                Holding.asset_id == asset_id,
+                Holding.amount <= 0
+            )
+        )
+        self._record_change(db, asset_id, balance + amount, balance)
+    
+    @staticmethod
+    def _record_change(db: Session, asset_id: int, previous: float, balance: float):
+        """Move the asset's rollup by a holding's change, counting only positive holdings"""
+        previous, balance = max(previous, 0.0), max(balance, 0.0)
+        income_rollups.record_holding_change(
+            db.connection(), asset_id,
+            holders=int(balance > 0) - int(previous > 0),
+            supply=balance - previous,
+            square_sum=balance ** 2 - previous ** 2
+        )
+
+
+# Global holding ledger instance
+holding_ledger = HoldingLedger()
@@ -0,0 +1,134 @@
+"""
+Incrementally maintained per-asset income analytics
+"""
+
+from typing import Any, Dict, Optional
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import func
+
+from database.database import UPSERT_INSERTS
+from models.models import AssetIncomeRollup, IncomeDistribution
+
+ROLLUP_COLUMNS = (
+    "distribution_count", "completed_count", "distributed_total", "scheduled_total",
+    "holder_count", "circulating_supply", "holding_square_sum"
+)
+
+
+class IncomeRollupService:
+    """Keeps asset_income_rollups in step with distributions and holdings
+    
+    Every change is applied as a delta in the same transaction as the write
+    that caused it: distribution inserts, status changes and deletes through
+    mapper events, and holding moves through the holding ledger. Reading an
+    asset's analytics is then a single primary key lookup.
+    """
+    
+    def apply(self, connection: Connection, asset_id: int, **deltas: float):
+        """Add `deltas` to an asset's rollup, creating the row if needed"""
+        if not any(deltas.values()):
+            return
+        
+        values = {column: deltas.get(column, 0) for column in ROLLUP_COLUMNS}
+        insert = UPSERT_INSERTS[connection.dialect.name]
+        statement = insert(AssetIncomeRollup).values(asset_id=asset_id, **values)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[AssetIncomeRollup.asset_id],
+            set_={
+                **{
+                    column: getattr(AssetIncomeRollup, column) + getattr(statement.excluded, column)
+                    for column in deltas
+                },
+                "updated_at": func.now()
+            }
+        ))
+    
+    @staticmethod
+    def distribution_totals(status: Optional[str], total_income: float) -> Dict[str, float]:
+        """Get what one distribution contributes to its asset's rollup"""
+        return {
+            "distribution_count": 1,
+            "completed_count": 1 if status == "completed" else 0,
+            "distributed_total": total_income if status == "completed" else 0.0,
+            "scheduled_total": total_income if status == "scheduled" else 0.0
+        }
+    
+    def _stored_totals(self, connection: Connection, distribution_id: int) -> Dict[str, float]:
+        """Get a distribution's contribution as currently stored in the database"""
+        status, total_income = connection.execute(
+            select(IncomeDistribution.status, IncomeDistribution.total_income).where(
+                IncomeDistribution.id == distribution_id
+            )
+        ).one()
+        return self.distribution_totals(status, total_income)
+    
+    def record_distribution_insert(self, connection: Connection, distribution: IncomeDistribution):
+        """Count a new distribution"""
+        self.apply(
+            connection, distribution.asset_id,
+            **self.distribution_totals(distribution.status, distribution.total_income)
+        )
+    
+    def record_distribution_update(self, connection: Connection, distribution: IncomeDistribution):
+        """Move a distribution's contribution when its status or income changes"""
+        old = self._stored_totals(connection, distribution.id)
+        new = self.distribution_totals(distribution.status, distribution.total_income)
+        self.apply(connection, distribution.asset_id, **{
+            column: new[column] - old[column] for column in new
+        })
+    
+    def record_distribution_delete(self, connection: Connection, distribution: IncomeDistribution):
+        """Remove a deleted distribution's contribution"""
+        old = self._stored_totals(connection, distribution.id)
+        self.apply(connection, distribution.asset_id, **{
+            column: -value for column, value in old.items()
+        })
+    
+    def record_holding_change(self, connection: Connection, asset_id: int,
+                              holders: int, supply: float, square_sum: float):
+        """Apply a change in an asset's holder count, tokens held and squared balances"""
+        self.apply(
+            connection, asset_id,
+            holder_count=holders, circulating_supply=supply, holding_square_sum=square_sum
+        )
+    
+    @staticmethod
+    def analytics(rollup: Optional[AssetIncomeRollup]) -> Dict[str, Any]:
+        """Describe an asset's rollup, or an empty one for assets without activity"""
+        distribution_count = rollup.distribution_count if rollup else 0
+        distributed_total = rollup.distributed_total if rollup else 0.0
+        return {
+            "tokens_in_circulation": rollup.circulating_supply if rollup else 0.0,
+            "total_holders": rollup.holder_count if rollup else 0,
+            "total_distributions": distribution_count,
+            "completed_distributions": rollup.completed_count if rollup else 0,
+            "total_income_distributed": distributed_total,
+            "total_income_scheduled": rollup.scheduled_total if rollup else 0.0,
+            "average_distribution": distributed_total / distribution_count if distribution_count else 0,
+            "updated_at": rollup.updated_at if rollup else None
+        }
+
+
+# Global income rollup service instance
+income_rollups = IncomeRollupService()
+
+
+@event.listens_for(IncomeDistribution, "after_insert")
+def _rollup_distribution_insert(mapper, connection, target):
+    """Count distributions as they are inserted"""
+    income_rollups.record_distribution_insert(connection, target)
+
+
+@event.listens_for(IncomeDistribution, "before_update")
+def _rollup_distribution_update(mapper, connection, target):
+    """Move distributions between totals as their status changes"""
+    attrs = inspect(target).attrs
+    if attrs.status.history.has_changes() or attrs.total_income.history.has_changes():
+        income_rollups.record_distribution_update(connection, target)
+
+
+@event.listens_for(IncomeDistribution, "before_delete")
+def _rollup_distribution_delete(mapper, connection, target):
+    """Uncount distributions as they are deleted"""
+    income_rollups.record_distribution_delete(connection, target)
@@ -0,0 +1,83 @@
+"""
+Database-backed leader lease so only one worker runs scheduled jobs
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from database.database import SessionLocal
+from models.models import SchedulerLease
+
+
+class LeaderLease:
+    """A named lease that one holder at a time keeps alive by renewing it"""
+    
+    def __init__(self, name: str, ttl_seconds: float):
+        """Initialize lease"""
+        self.name = name
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+    
+    def try_acquire(self) -> bool:
+        """Acquire or renew the lease; returns whether this process holds it"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            expires_at = now + self.ttl
+            
+            # Renew our own lease or take over an expired one in a single statement
+            updated = db.query(SchedulerLease).filter(
+                SchedulerLease.name == self.name,
+                or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+            ).update(
+                {SchedulerLease.holder: self.holder, SchedulerLease.expires_at: expires_at},
+                synchronize_session=False
+            )
+            
+            if updated:
+                db.commit()
+                self.is_leader = True
+                return True
+            
+            exists = db.query(SchedulerLease.name).filter(
+                SchedulerLease.name == self.name
+            ).first()
+            if exists:
+                db.rollback()
+                self.is_leader = False
+                return False
+            
+            db.add(SchedulerLease(name=self.name, holder=self.holder, expires_at=expires_at))
+            try:
+                db.commit()
+                self.is_leader = True
+            except IntegrityError:
+                # Another worker created the lease first
+                db.rollback()
+                self.is_leader = False
+            return self.is_leader
+            
+        except Exception:
+            db.rollback()
+            self.is_leader = False
+            raise
+        finally:
+            db.close()
+    
+    def release(self):
+        """Give up the lease if this process holds it"""
+        db = SessionLocal()
+        try:
+            db.query(SchedulerLease).filter(
+                SchedulerLease.name == self.name,
+                SchedulerLease.holder == self.holder
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            self.is_leader = False
+            db.close()
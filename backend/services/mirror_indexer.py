@@ -0,0 +1,197 @@
+"""
+Incremental Mirror Node indexer backing local transaction queries
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session
+
+from database.database import SessionLocal
+from models.models import (
+    User, Transaction, MirrorTransaction, MirrorTransactionToken, MirrorSyncCheckpoint
+)
+from services.mirror_service import mirror_service
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MirrorIndexer:
+    """Keeps a local, indexed copy of Mirror Node transactions for tracked accounts"""
+    
+    # The Mirror Node only lists transactions per account, so token activity is
+    # indexed through the tracked accounts that send or receive the token
+    ACCOUNT_SCOPE = "account"
+    
+    def get_tracked_accounts(self, db: Session) -> List[str]:
+        """Accounts whose history is mirrored locally: user wallets and the treasury"""
+        accounts = [wallet_id for (wallet_id,) in db.query(User.wallet_id).all()]
+        if settings.TREASURY_ID and settings.TREASURY_ID not in accounts:
+            accounts.append(settings.TREASURY_ID)
+        return accounts
+    
+    def get_checkpoint(self, db: Session, account_id: str) -> Optional[MirrorSyncCheckpoint]:
+        """Get the sync checkpoint for an account, if it has ever been indexed"""
+        return db.query(MirrorSyncCheckpoint).filter(
+            MirrorSyncCheckpoint.scope == self.ACCOUNT_SCOPE,
+            MirrorSyncCheckpoint.entity_id == account_id
+        ).first()
+    
+    def is_fresh(self, db: Session, account_id: str) -> bool:
+        """Check whether an account was synced within MIRROR_INDEX_MAX_AGE, so its index can be served"""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.MIRROR_INDEX_MAX_AGE)
+        return db.query(MirrorSyncCheckpoint.id).filter(
+            MirrorSyncCheckpoint.scope == self.ACCOUNT_SCOPE,
+            MirrorSyncCheckpoint.entity_id == account_id,
+            MirrorSyncCheckpoint.last_synced_at >= cutoff
+        ).first() is not None
+    
+    async def sync_account(self, db: Session, account_id: str) -> int:
+        """Pull records newer than the account's checkpoint into the local index"""
+        checkpoint = self.get_checkpoint(db, account_id)
+        if not checkpoint:
+            checkpoint = MirrorSyncCheckpoint(scope=self.ACCOUNT_SCOPE, entity_id=account_id)
+            db.add(checkpoint)
+            db.flush()
+        
+        indexed = 0
+        async for page in mirror_service.iter_pages(
+            f"/accounts/{account_id}/transactions",
+            params={
+                "limit": settings.MIRROR_SYNC_PAGE_SIZE,
+                "order": "asc",
+                **({"timestamp": f"gt:{checkpoint.last_consensus_timestamp}"}
+                   if checkpoint.last_consensus_timestamp else {})
+            }
+        ):
+            for record in page:
+                db.add(self._to_index_row(account_id, record))
+            
+            # Commit page by page so an interrupted sync resumes from here
+            checkpoint.last_consensus_timestamp = page[-1].get("consensus_timestamp")
+            db.commit()
+            indexed += len(page)
+        
+        checkpoint.last_synced_at = datetime.utcnow()
+        db.commit()
+        return indexed
+    
+    @staticmethod
+    def _to_index_row(account_id: str, record: Dict[str, Any]) -> MirrorTransaction:
+        """Build an index row (with its token links) from a raw Mirror Node record"""
+        token_ids = {
+            transfer.get("token_id")
+            for transfer in record.get("token_transfers", []) + record.get("nft_transfers", [])
+            if transfer.get("token_id")
+        }
+        return MirrorTransaction(
+            account_id=account_id,
+            transaction_id=record.get("transaction_id"),
+            consensus_timestamp=record.get("consensus_timestamp"),
+            name=record.get("name"),
+            result=record.get("result"),
+            data=record,
+            tokens=[MirrorTransactionToken(token_id=token_id) for token_id in sorted(token_ids)]
+        )
+    
+    async def reconcile_pending_transactions(self, db: Session) -> int:
+        """Resolve locally "pending" transactions against their consensus result"""
+        pending = db.query(Transaction).filter(Transaction.status == "pending").all()
+        if not pending:
+            return 0
+        
+        mirror_ids = {
+            tx.transaction_id: mirror_service.to_mirror_transaction_id(tx.transaction_id)
+            for tx in pending
+        }
+        results = {
+            row.transaction_id: row.result
+            for row in db.query(MirrorTransaction.transaction_id, MirrorTransaction.result).filter(
+                MirrorTransaction.transaction_id.in_(list(mirror_ids.values()))
+            )
+        }
+        
+        # Anything the index has not seen yet is looked up directly
+        limiter = asyncio.Semaphore(settings.MIRROR_SYNC_CONCURRENCY)
+        
+        async def lookup(mirror_id: str):
+            async with limiter:
+                info = await mirror_service.get_transaction_info(mirror_id)
+            if info.get("transactions"):
+                results[mirror_id] = info["transactions"][0].get("result")
+        
+        await asyncio.gather(*(
+            lookup(mirror_id) for mirror_id in mirror_ids.values() if mirror_id not in results
+        ))
+        
+        reconciled = 0
+        for tx in pending:
+            result = results.get(mirror_ids[tx.transaction_id])
+            if result is None:
+                continue
+            tx.status = "success" if result == "SUCCESS" else "failed"
+            reconciled += 1
+        
+        db.commit()
+        return reconciled
+    
+    async def sync_all(self) -> Dict[str, Any]:
+        """Sync every tracked account and reconcile pending transactions"""
+        db = SessionLocal()
+        try:
+            accounts = self.get_tracked_accounts(db)
+        finally:
+            db.close()
+        
+        limiter = asyncio.Semaphore(settings.MIRROR_SYNC_CONCURRENCY)
+        
+        async def sync_one(account_id: str) -> int:
+            async with limiter:
+                account_db = SessionLocal()
+                try:
+                    return await self.sync_account(account_db, account_id)
+                except Exception as e:
+                    account_db.rollback()
+                    logger.error(f"Error indexing Mirror Node data for {account_id}: {e}")
+                    return 0
+                finally:
+                    account_db.close()
+        
+        indexed = await asyncio.gather(*(sync_one(account_id) for account_id in accounts))
+        
+        db = SessionLocal()
+        try:
+            reconciled = await self.reconcile_pending_transactions(db)
+        finally:
+            db.close()
+        
+        return {
+            "accounts": len(accounts),
+            "indexed_transactions": sum(indexed),
+            "reconciled_transactions": reconciled
+        }
+    
+    def query_account_transactions(self, db: Session, account_id: str, limit: int = 25,
+                                   order: str = "desc") -> List[Dict[str, Any]]:
+        """Get an account's transactions from the local index"""
+        ordering = MirrorTransaction.consensus_timestamp
+        ordering = ordering.asc() if order == "asc" else ordering.desc()
+        rows = db.query(MirrorTransaction.data).filter(
+            MirrorTransaction.account_id == account_id
+        ).order_by(ordering).limit(limit)
+        return [row.data for row in rows]
+    
+    def query_asset_transactions(self, db: Session, account_id: str, token_ids: List[str],
+                                 limit: int = 25) -> List[Dict[str, Any]]:
+        """Get an account's most recent transactions touching any of the given tokens"""
+        rows = db.query(MirrorTransaction.data).filter(
+            MirrorTransaction.account_id == account_id,
+            MirrorTransaction.tokens.any(MirrorTransactionToken.token_id.in_(token_ids))
+        ).order_by(MirrorTransaction.consensus_timestamp.desc()).limit(limit)
+        return [row.data for row in rows]
+
+
+# Global indexer instance
+mirror_indexer = MirrorIndexer()
@@ -2,8 +2,13 @@
 Mirror Node service for querying Hedera transaction data
 """
 
-import requests
-from typing import Dict, Any, List, Optional
+import asyncio
+import heapq
+import weakref
+import httpx
+from typing import AsyncIterator, Dict, Any, List, Optional
+from urllib.parse import urlencode, urlsplit
+from utils.cache import TTLCache
 from utils.config import settings
 
 
@@ -13,97 +18,158 @@ class MirrorNodeService:
     def __init__(self):
         """Initialize Mirror Node service"""
         self.base_url = settings.MIRROR_NODE_API
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'Content-Type': 'application/json',
             'User-Agent': 'AssetFraction-Backend/1.0.0'
-        })
+        }
+        self.limits = httpx.Limits(
+            max_connections=settings.MIRROR_NODE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.MIRROR_NODE_MAX_KEEPALIVE,
+            keepalive_expiry=settings.MIRROR_NODE_KEEPALIVE_EXPIRY
+        )
+        self.timeout = httpx.Timeout(
+            settings.MIRROR_NODE_TIMEOUT,
+            connect=settings.MIRROR_NODE_CONNECT_TIMEOUT
+        )
+        # Pooled clients and per-host semaphores are bound to the event loop
+        # that created them, so keep one set per running loop
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = \
+            weakref.WeakKeyDictionary()
+        self._host_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+            weakref.WeakKeyDictionary()
+        self.cache = TTLCache(max_bytes=settings.MIRROR_CACHE_MAX_BYTES)
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout
+            )
+            self._clients[loop] = client
+        return client
+    
+    def _get_host_limit(self, url: str) -> asyncio.Semaphore:
+        """Get the concurrency limiter for the host serving a URL"""
+        loop = asyncio.get_running_loop()
+        limits = self._host_limits.setdefault(loop, {})
+        host = urlsplit(url).netloc
+        if host not in limits:
+            limits[host] = asyncio.Semaphore(settings.MIRROR_NODE_MAX_CONCURRENCY_PER_HOST)
+        return limits[host]
+    
+    def _build_url(self, path: str) -> str:
+        """Resolve an API path against the configured Mirror Node base URL"""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        if path.startswith("/api/"):
+            # Mirror Node "links.next" cursors are absolute paths on the same host
+            parts = urlsplit(self.base_url)
+            return f"{parts.scheme}://{parts.netloc}{path}"
+        return f"{self.base_url}{path}"
+    
+    async def _fetch(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Issue a GET request against the Mirror Node and decode the JSON body"""
+        async with self._get_host_limit(url):
+            response = await self._get_client().get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+    
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None,
+                   ttl: float = 0) -> Dict[str, Any]:
+        """GET a Mirror Node resource, served from the response cache when `ttl` > 0
+        
+        Cached responses are shared between callers and must not be mutated.
+        """
+        url = self._build_url(path)
+        if ttl <= 0:
+            return await self._fetch(url, params)
+        
+        key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+        return await self.cache.get_or_load(key, lambda: self._fetch(url, params), ttl)
+    
+    async def close(self):
+        """Close the pooled HTTP client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
     
     async def get_account_info(self, account_id: str) -> Dict[str, Any]:
         """Get account information from Mirror Node"""
         try:
-            url = f"{self.base_url}/accounts/{account_id}"
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self._get(f"/accounts/{account_id}", ttl=settings.MIRROR_CACHE_ACCOUNT_TTL)
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e), "status": "failed"}
     
     async def get_account_transactions(self, account_id: str, limit: int = 25, 
                                      order: str = "desc") -> Dict[str, Any]:
         """Get transaction history for an account"""
         try:
-            url = f"{self.base_url}/accounts/{account_id}/transactions"
+            path = f"/accounts/{account_id}/transactions"
             params = {
                 "limit": limit,
                 "order": order
             }
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self._get(path, params=params, ttl=settings.MIRROR_CACHE_ACCOUNT_TTL)
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e), "status": "failed"}
     
     async def get_token_info(self, token_id: str) -> Dict[str, Any]:
         """Get token information from Mirror Node"""
         try:
-            url = f"{self.base_url}/tokens/{token_id}"
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self._get(f"/tokens/{token_id}", ttl=settings.MIRROR_CACHE_TOKEN_TTL)
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e), "status": "failed"}
     
     async def get_token_balances(self, account_id: str) -> Dict[str, Any]:
         """Get token balances for an account"""
         try:
-            url = f"{self.base_url}/accounts/{account_id}/tokens"
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self._get(f"/accounts/{account_id}/tokens", ttl=settings.MIRROR_CACHE_ACCOUNT_TTL)
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e), "status": "failed"}
     
     async def get_nft_info(self, token_id: str, serial_number: int) -> Dict[str, Any]:
         """Get NFT information from Mirror Node"""
         try:
-            url = f"{self.base_url}/tokens/{token_id}/nfts/{serial_number}"
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self._get(
+                f"/tokens/{token_id}/nfts/{serial_number}", ttl=settings.MIRROR_CACHE_TOKEN_TTL
+            )
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e), "status": "failed"}
     
     async def get_transaction_info(self, transaction_id: str) -> Dict[str, Any]:
         """Get detailed transaction information"""
         try:
-            url = f"{self.base_url}/transactions/{transaction_id}"
-            response = self.session.get(url)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self._get(f"/transactions/{transaction_id}")
+        except httpx.HTTPStatusError as e:
+            # The Mirror Node answers 404 for transactions that never reached consensus
+            status = "not_found" if e.response.status_code == 404 else "failed"
+            return {"error": str(e), "status": status}
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e), "status": "failed"}
     
     async def get_topic_messages(self, topic_id: str, limit: int = 25, 
                                order: str = "desc") -> Dict[str, Any]:
         """Get messages from a HCS topic"""
         try:
-            url = f"{self.base_url}/topics/{topic_id}/messages"
+            path = f"/topics/{topic_id}/messages"
             params = {
                 "limit": limit,
                 "order": order
             }
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self._get(path, params=params)
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e), "status": "failed"}
     
     async def search_transactions(self, account_id: str, transaction_type: Optional[str] = None,
                                 token_id: Optional[str] = None, limit: int = 25) -> Dict[str, Any]:
         """Search transactions with filters"""
         try:
-            url = f"{self.base_url}/transactions"
+            path = "/transactions"
             params = {
                 "account.id": account_id,
                 "limit": limit,
@@ -115,66 +181,137 @@ class MirrorNodeService:
             if token_id:
                 params["token.id"] = token_id
             
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return await self._get(path, params=params)
+        except (httpx.HTTPError, ValueError) as e:
             return {"error": str(e), "status": "failed"}
     
+    async def iter_pages(self, path: str, params: Optional[Dict[str, Any]] = None,
+                         key: str = "transactions") -> AsyncIterator[List[Dict[str, Any]]]:
+        """Lazily yield result pages, following the Mirror Node "links.next" cursor"""
+        next_path: Optional[str] = path
+        while next_path:
+            page = await self._get(next_path, params=params)
+            # The next link already carries the query string of the original request
+            params = None
+            records = page.get(key, [])
+            if records:
+                yield records
+            next_path = (page.get("links") or {}).get("next")
+    
+    async def iter_account_transactions(self, account_id: str, order: str = "desc",
+                                        page_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Stream an account's full transaction history one record at a time"""
+        params = {"limit": page_size, "order": order}
+        async for page in self.iter_pages(f"/accounts/{account_id}/transactions", params):
+            for transaction in page:
+                yield transaction
+    
+    async def iter_search_transactions(self, account_id: str, transaction_type: Optional[str] = None,
+                                       token_id: Optional[str] = None, order: str = "desc",
+                                       page_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Stream all transactions matching the search filters one record at a time"""
+        params = {"account.id": account_id, "limit": page_size, "order": order}
+        if transaction_type:
+            params["transactiontype"] = transaction_type
+        if token_id:
+            params["token.id"] = token_id
+        
+        async for page in self.iter_pages("/transactions", params):
+            for transaction in page:
+                yield transaction
+    
+    @staticmethod
+    def _timestamp_key(transaction: Dict[str, Any]) -> tuple:
+        """Sort key for Mirror Node "seconds.nanos" consensus timestamps"""
+        seconds, _, nanos = (transaction.get("consensus_timestamp") or "0.0").partition(".")
+        return (int(seconds or 0), int(nanos or 0))
+    
     async def get_asset_related_transactions(self, account_id: str, 
-                                           asset_tokens: List[str]) -> Dict[str, Any]:
+                                           asset_tokens: List[str],
+                                           limit: int = 25) -> Dict[str, Any]:
         """Get transactions related to specific asset tokens"""
         try:
-            all_transactions = []
+            # Each page comes back newest first, so the overall top `limit`
+            # is always contained in the first `limit` rows of every token
+            limiter = asyncio.Semaphore(settings.MIRROR_NODE_FANOUT_CONCURRENCY)
             
-            for token_id in asset_tokens:
-                result = await self.search_transactions(
-                    account_id=account_id,
-                    token_id=token_id,
-                    limit=50
-                )
-                
-                if "transactions" in result:
-                    all_transactions.extend(result["transactions"])
+            async def fetch_page(token_id: str) -> List[Dict[str, Any]]:
+                async with limiter:
+                    result = await self.search_transactions(
+                        account_id=account_id,
+                        token_id=token_id,
+                        limit=limit
+                    )
+                return result.get("transactions", [])
             
-            # Sort by consensus timestamp (most recent first)
-            all_transactions.sort(
-                key=lambda x: x.get("consensus_timestamp", ""),
-                reverse=True
-            )
+            # Any token's page may hold the newest rows, so the merge waits for all of them
+            pages = await asyncio.gather(*(
+                fetch_page(token_id) for token_id in dict.fromkeys(asset_tokens) if token_id
+            ))
+            
+            # k-way merge on consensus timestamp (most recent first), stopping
+            # as soon as the top `limit` distinct transactions are known
+            merged = heapq.merge(*pages, key=self._timestamp_key, reverse=True)
+            seen = set()
+            top_transactions = []
+            for tx in merged:
+                tx_key = (tx.get("transaction_id"), tx.get("consensus_timestamp"))
+                if tx_key in seen:
+                    continue
+                seen.add(tx_key)
+                top_transactions.append(tx)
+                if len(top_transactions) >= limit:
+                    break
             
             return {
-                "transactions": all_transactions[:25],  # Limit to 25 most recent
-                "total": len(all_transactions)
+                "transactions": top_transactions,
+                "total": sum(len(page) for page in pages)  # Rows fetched across all tokens
             }
-            
+        
         except Exception as e:
             return {"error": str(e), "status": "failed"}
     
     async def get_income_distribution_proof(self, transaction_ids: List[str]) -> Dict[str, Any]:
         """Get proof of income distribution transactions"""
         try:
-            proofs = []
+            limiter = asyncio.Semaphore(settings.MIRROR_NODE_PROOF_CONCURRENCY)
+            
+            async def fetch_proof(tx_id: str) -> Optional[Dict[str, Any]]:
+                # Payouts store SDK IDs, which the Mirror Node does not resolve
+                async with limiter:
+                    tx_info = await self.get_transaction_info(self.to_mirror_transaction_id(tx_id))
+                if "error" in tx_info:
+                    return None
+                # /transactions/{id} wraps the record in a "transactions" list
+                if tx_info.get("transactions"):
+                    tx_info = tx_info["transactions"][0]
+                return {
+                    "transaction_id": tx_id,
+                    "consensus_timestamp": tx_info.get("consensus_timestamp"),
+                    "result": tx_info.get("result"),
+                    "transfers": tx_info.get("transfers", []),
+                    "token_transfers": tx_info.get("token_transfers", [])
+                }
             
-            for tx_id in transaction_ids:
-                tx_info = await self.get_transaction_info(tx_id)
-                if "error" not in tx_info:
-                    proofs.append({
-                        "transaction_id": tx_id,
-                        "consensus_timestamp": tx_info.get("consensus_timestamp"),
-                        "result": tx_info.get("result"),
-                        "transfers": tx_info.get("transfers", []),
-                        "token_transfers": tx_info.get("token_transfers", [])
-                    })
+            results = await asyncio.gather(*(fetch_proof(tx_id) for tx_id in transaction_ids))
+            proofs = [proof for proof in results if proof is not None]
             
             return {
                 "proofs": proofs,
                 "total": len(proofs)
             }
-            
+        
         except Exception as e:
             return {"error": str(e), "status": "failed"}
     
+    @staticmethod
+    def to_mirror_transaction_id(transaction_id: str) -> str:
+        """Convert an SDK transaction ID (0.0.x@s.n) to Mirror Node format (0.0.x-s-n)"""
+        if "@" not in transaction_id:
+            return transaction_id
+        account_id, _, valid_start = transaction_id.partition("@")
+        return f"{account_id}-{valid_start.replace('.', '-')}"
+    
     def format_transaction_for_frontend(self, transaction: Dict[str, Any]) -> Dict[str, Any]:
         """Format transaction data for frontend consumption"""
         return {
@@ -189,23 +326,41 @@ class MirrorNodeService:
             "valid_start_timestamp": transaction.get("valid_start_timestamp")
         }
     
+    async def _get_portfolio_section(self, coro) -> Dict[str, Any]:
+        """Await one portfolio section, turning slow or failed calls into an error dict"""
+        try:
+            return await asyncio.wait_for(coro, timeout=settings.MIRROR_PORTFOLIO_SECTION_TIMEOUT)
+        except asyncio.TimeoutError:
+            return {"error": "Mirror Node request timed out", "status": "failed"}
+        except Exception as e:
+            return {"error": str(e), "status": "failed"}
+    
     async def get_portfolio_summary(self, account_id: str) -> Dict[str, Any]:
-        """Get portfolio summary for an account"""
+        """Get portfolio summary for an account
+        
+        Account info, token balances and recent transactions are fetched
+        concurrently. Sections that fail are reported under "errors" and the
+        rest are still returned; the call only fails if every section fails.
+        """
         try:
-            # Get account info
-            account_info = await self.get_account_info(account_id)
-            if "error" in account_info:
-                return account_info
-            
-            # Get token balances
-            token_balances = await self.get_token_balances(account_id)
-            if "error" in token_balances:
-                return token_balances
+            account_info, token_balances, transactions = await asyncio.gather(
+                self._get_portfolio_section(self.get_account_info(account_id)),
+                self._get_portfolio_section(self.get_token_balances(account_id)),
+                self._get_portfolio_section(self.get_account_transactions(account_id, limit=10))
+            )
             
-            # Get recent transactions
-            transactions = await self.get_account_transactions(account_id, limit=10)
-            if "error" in transactions:
-                return transactions
+            sections = {
+                "account": account_info,
+                "tokens": token_balances,
+                "recent_transactions": transactions
+            }
+            errors = {
+                name: section["error"]
+                for name, section in sections.items()
+                if "error" in section
+            }
+            if len(errors) == len(sections):
+                return account_info
             
             return {
                 "account_id": account_id,
@@ -215,9 +370,11 @@ class MirrorNodeService:
                     self.format_transaction_for_frontend(tx)
                     for tx in transactions.get("transactions", [])
                 ],
+                "partial": bool(errors),
+                "errors": errors,
                 "status": "success"
             }
-            
+        
         except Exception as e:
             return {"error": str(e), "status": "failed"}
 
@@ -0,0 +1,361 @@
+"""
+Payout engine for executing income distributions
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional, Tuple, Awaitable, Callable
+from sqlalchemy import Row, case, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.models import IncomeDistribution, IncomePayout, User
+from services.hedera_service import hedera_service
+from services.mirror_service import mirror_service
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PayoutEngine:
+    """Executes distribution payouts with bounded concurrency and batched commits
+    
+    Payouts move through pending -> submitting -> submitted -> success/failed.
+    Holders are packed into multi-recipient transfers, so one transaction (and
+    one fee) pays a whole batch. Each batch is claimed under a pre-generated
+    transaction ID that is committed before anything is sent, so a run that
+    dies partway can be resumed without paying twice: pending rows are
+    submitted, submitted rows only have their receipts checked, and rows left
+    submitting or failed are settled against the Mirror Node by transaction ID.
+    The distribution's `payout_cursor` marks the settled prefix of payouts,
+    which resumed runs skip entirely.
+    """
+    
+    @staticmethod
+    def idempotency_key(distribution_id: int, user_id: int) -> str:
+        """Key identifying the single payout a holder may receive from a distribution"""
+        return f"{distribution_id}:{user_id}"
+    
+    def create_payouts(self, db: Session, distribution: IncomeDistribution,
+                       holders: List[Tuple[int, str, float]]) -> int:
+        """Bulk insert pending payout rows for every holder, unless they already exist"""
+        existing = db.query(IncomePayout.id).filter(
+            IncomePayout.distribution_id == distribution.id
+        ).first()
+        if existing or not holders:
+            return 0
+        
+        # Payout amounts based on each holder's share of tokens in circulation
+        total_tokens = sum(amount for _, _, amount in holders)
+        income_per_token = distribution.total_income / total_tokens
+        
+        try:
+            db.execute(insert(IncomePayout), [
+                {
+                    "distribution_id": distribution.id,
+                    "user_id": user_id,
+                    "amount": amount * income_per_token,
+                    "idempotency_key": self.idempotency_key(distribution.id, user_id),
+                    "status": "pending"
+                }
+                for user_id, _, amount in holders
+            ])
+            db.commit()
+        except IntegrityError:
+            # A concurrent run created this distribution's payouts first
+            db.rollback()
+            return 0
+        return len(holders)
+    
+    def _open_payouts(self, db: Session, distribution: IncomeDistribution, *statuses: str):
+        """Query payouts past the distribution's checkpoint in the given statuses"""
+        return db.query(IncomePayout).filter(
+            IncomePayout.distribution_id == distribution.id,
+            IncomePayout.id > (distribution.payout_cursor or 0),
+            IncomePayout.status.in_(statuses)
+        )
+    
+    def advance_cursor(self, db: Session, distribution: IncomeDistribution) -> int:
+        """Move the checkpoint cursor past the leading run of settled payouts"""
+        cursor = distribution.payout_cursor or 0
+        first_open = db.query(func.min(IncomePayout.id)).filter(
+            IncomePayout.distribution_id == distribution.id,
+            IncomePayout.id > cursor,
+            IncomePayout.status != "success"
+        ).scalar()
+        if first_open is not None:
+            cursor = first_open - 1
+        else:
+            cursor = db.query(func.max(IncomePayout.id)).filter(
+                IncomePayout.distribution_id == distribution.id
+            ).scalar() or cursor
+        
+        distribution.payout_cursor = cursor
+        return cursor
+    
+    def requeue_unsent(self, db: Session, distribution: IncomeDistribution) -> int:
+        """Return failed payouts that never reached the network to pending"""
+        requeued = self._open_payouts(db, distribution, "failed").filter(
+            IncomePayout.transaction_id.is_(None)
+        ).update({IncomePayout.status: "pending"}, synchronize_session=False)
+        db.commit()
+        return requeued
+    
+    @staticmethod
+    def _retry_is_safe(transaction_id: str) -> bool:
+        """Check that a transfer the Mirror Node has not seen can no longer reach consensus"""
+        _, _, valid_start = transaction_id.partition("@")
+        try:
+            return time.time() - float(valid_start) > settings.PAYOUT_RECONCILE_AFTER
+        except ValueError:
+            return False
+    
+    async def reconcile_in_doubt(self, db: Session, distribution: IncomeDistribution):
+        """Settle payouts whose pinned transfer may or may not have reached consensus
+        
+        Covers rows a crashed run left submitting and rows whose submission or
+        receipt failed. Transfers that succeeded are marked paid; transfers that
+        failed at consensus, or expired without ever reaching it, go back to
+        pending for a fresh transaction ID. Anything still ambiguous is left
+        for the next resume.
+        """
+        by_transaction: Dict[str, List[IncomePayout]] = {}
+        for payout in self._open_payouts(db, distribution, "submitting", "failed").filter(
+            IncomePayout.transaction_id.isnot(None)
+        ):
+            by_transaction.setdefault(payout.transaction_id, []).append(payout)
+        
+        async def lookup(batch: List[IncomePayout]) -> Dict[str, Any]:
+            return await mirror_service.get_transaction_info(
+                mirror_service.to_mirror_transaction_id(batch[0].transaction_id)
+            )
+        
+        def apply(batch: List[IncomePayout], info: Dict[str, Any]):
+            records = info.get("transactions") or []
+            if any(record.get("result") == "SUCCESS" for record in records):
+                for payout in batch:
+                    payout.status = "success"
+            elif records or (info.get("status") == "not_found"
+                             and self._retry_is_safe(batch[0].transaction_id)):
+                for payout in batch:
+                    payout.status = "pending"
+                    payout.transaction_id = None
+        
+        await self._run_batched(
+            db, list(by_transaction.values()), lookup, apply, settings.PAYOUT_RECEIPT_CONCURRENCY
+        )
+    
+    async def recover(self, db: Session, distribution: IncomeDistribution):
+        """Prepare an interrupted distribution's remaining payouts for another run"""
+        await self.reconcile_in_doubt(db, distribution)
+        self.requeue_unsent(db, distribution)
+    
+    @staticmethod
+    def _set_status(db: Session, payout_ids: List[int], status: str):
+        """Move payouts to a status in one UPDATE"""
+        db.query(IncomePayout).filter(IncomePayout.id.in_(payout_ids)).update(
+            {IncomePayout.status: status}, synchronize_session=False
+        )
+    
+    @staticmethod
+    def chunk_payouts(payouts: List[Tuple[Any, str]],
+                      max_recipients: int) -> List[List[Tuple[Any, str]]]:
+        """Group (payout, wallet_id) pairs into transfer batches that never repeat a wallet"""
+        # The n-th payout to a wallet goes into layer n, so every layer holds
+        # distinct wallets and can be cut into batches directly
+        layers: List[List[Tuple[Any, str]]] = []
+        seen: Dict[str, int] = {}
+        for payout, wallet_id in payouts:
+            layer = seen.get(wallet_id, 0)
+            seen[wallet_id] = layer + 1
+            if layer == len(layers):
+                layers.append([])
+            layers[layer].append((payout, wallet_id))
+        
+        return [
+            layer[start:start + max_recipients]
+            for layer in layers
+            for start in range(0, len(layer), max_recipients)
+        ]
+    
+    async def _run_batched(self, db: Session, batches: List[list],
+                           action: Callable[[list], Awaitable[Dict[str, Any]]],
+                           apply: Callable[[list, Dict[str, Any]], None],
+                           concurrency: int,
+                           checkpoint: Optional[Callable[[], Any]] = None):
+        """Run `action` for each batch concurrently, applying results in committed batches"""
+        limiter = asyncio.Semaphore(concurrency)
+        
+        async def run_one(batch: list):
+            async with limiter:
+                try:
+                    result = await action(batch)
+                except Exception as e:
+                    result = {"error": str(e), "status": "failed"}
+            return batch, result
+        
+        uncommitted = 0
+        for completed in asyncio.as_completed([run_one(batch) for batch in batches]):
+            batch, result = await completed
+            apply(batch, result)
+            uncommitted += len(batch)
+            if uncommitted >= settings.PAYOUT_COMMIT_BATCH_SIZE:
+                if checkpoint:
+                    checkpoint()
+                db.commit()
+                uncommitted = 0
+        
+        if uncommitted:
+            if checkpoint:
+                checkpoint()
+            db.commit()
+    
+    async def submit_pending(self, db: Session, distribution: IncomeDistribution):
+        """Submit multi-recipient HBAR transfers for all pending payouts"""
+        # Plain column rows: commits below expire ORM objects, and reloading
+        # each payout afterwards would cost a SELECT per holder
+        rows = db.query(IncomePayout.id, IncomePayout.user_id, IncomePayout.amount, User.wallet_id).outerjoin(
+            User, User.id == IncomePayout.user_id
+        ).filter(
+            IncomePayout.distribution_id == distribution.id,
+            IncomePayout.id > (distribution.payout_cursor or 0),
+            IncomePayout.status == "pending"
+        ).order_by(IncomePayout.id).all()
+        
+        payable = [(payout, payout.wallet_id) for payout in rows if payout.wallet_id]
+        orphaned = [payout for payout in rows if not payout.wallet_id]
+        for payout in orphaned:
+            logger.error(f"User {payout.user_id} not found")
+        if orphaned:
+            self._set_status(db, [payout.id for payout in orphaned], "failed")
+        db.commit()
+        
+        async def submit(claim: Tuple[str, List[Tuple[Row, str]]]) -> Dict[str, Any]:
+            transaction_id, batch = claim
+            return await hedera_service.submit_batch_hbar_transfer(
+                from_account=settings.TREASURY_ID,
+                recipients=[(wallet_id, payout.amount) for payout, wallet_id in batch],
+                private_key=settings.TREASURY_KEY,
+                transaction_id=transaction_id
+            )
+        
+        def apply(claim: Tuple[str, List[Tuple[Row, str]]], result: Dict[str, Any]):
+            _, batch = claim
+            # Failed rows keep their transaction ID so a resume can check it
+            # against the Mirror Node before paying again
+            self._set_status(
+                db, [payout.id for payout, _ in batch],
+                "submitted" if result.get("status") == "submitted" else "failed"
+            )
+            if result.get("status") != "submitted":
+                logger.error(f"Failed to pay batch of {len(batch)} holders: {result.get('error')}")
+        
+        batches = self.chunk_payouts(payable, hedera_service.max_batch_recipients)
+        for chunk in self._commit_chunks(batches):
+            claims = self._claim(db, chunk)
+            await self._run_batched(db, claims, submit, apply, settings.PAYOUT_SUBMIT_CONCURRENCY)
+    
+    @staticmethod
+    def _commit_chunks(batches: List[list]) -> List[List[list]]:
+        """Group transfer batches into chunks of about PAYOUT_COMMIT_BATCH_SIZE payouts"""
+        chunks: List[List[list]] = []
+        size = settings.PAYOUT_COMMIT_BATCH_SIZE
+        for batch in batches:
+            if not chunks or size + len(batch) > settings.PAYOUT_COMMIT_BATCH_SIZE:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(batch)
+            size += len(batch)
+        return chunks
+    
+    def _claim(self, db: Session, batches: List[List[Tuple[Row, str]]]) -> List[Tuple[str, list]]:
+        """Claim transfer batches under fresh transaction IDs in one UPDATE and one commit
+        
+        Once the claim is committed, a crash can no longer lead to a batch being
+        paid twice. Batches another run got to first, even partly, are released
+        and left to that run.
+        """
+        claims = [(hedera_service.new_transaction_id(settings.TREASURY_ID), batch) for batch in batches]
+        transaction_ids = {
+            payout.id: transaction_id for transaction_id, batch in claims for payout, _ in batch
+        }
+        claimed = db.query(IncomePayout).filter(
+            IncomePayout.id.in_(list(transaction_ids)),
+            IncomePayout.status == "pending"
+        ).update({
+            IncomePayout.status: "submitting",
+            IncomePayout.transaction_id: case(transaction_ids, value=IncomePayout.id)
+        }, synchronize_session=False)
+        
+        if claimed != len(transaction_ids):
+            ours = {
+                payout_id for (payout_id,) in db.query(IncomePayout.id).filter(
+                    IncomePayout.id.in_(list(transaction_ids)),
+                    IncomePayout.status == "submitting",
+                    IncomePayout.transaction_id.in_([transaction_id for transaction_id, _ in claims])
+                )
+            }
+            contested = {
+                transaction_id for transaction_id, batch in claims
+                if any(payout.id not in ours for payout, _ in batch)
+            }
+            if contested:
+                db.query(IncomePayout).filter(
+                    IncomePayout.transaction_id.in_(list(contested))
+                ).update({
+                    IncomePayout.status: "pending",
+                    IncomePayout.transaction_id: None
+                }, synchronize_session=False)
+                logger.warning(f"Skipped {len(contested)} batches claimed by another run")
+            claims = [claim for claim in claims if claim[0] not in contested]
+        
+        db.commit()
+        return claims
+    
+    async def confirm_submitted(self, db: Session, distribution: IncomeDistribution):
+        """Poll one receipt per submitted transfer and settle its payouts"""
+        payouts = self._open_payouts(db, distribution, "submitted").all()
+        
+        by_transaction: Dict[str, List[IncomePayout]] = {}
+        for payout in payouts:
+            by_transaction.setdefault(payout.transaction_id, []).append(payout)
+        
+        async def confirm(batch: List[IncomePayout]) -> Dict[str, Any]:
+            return await hedera_service.get_transaction_receipt(batch[0].transaction_id)
+        
+        def apply(batch: List[IncomePayout], result: Dict[str, Any]):
+            for payout in batch:
+                payout.status = "success" if result.get("status") == "success" else "failed"
+            if result.get("status") == "success":
+                logger.info(f"💸 Paid {len(batch)} holders in {batch[0].transaction_id}")
+            else:
+                logger.error(f"Transfer {batch[0].transaction_id} was not confirmed: {result.get('error')}")
+        
+        await self._run_batched(
+            db, list(by_transaction.values()), confirm, apply, settings.PAYOUT_RECEIPT_CONCURRENCY,
+            checkpoint=lambda: self.advance_cursor(db, distribution)
+        )
+    
+    async def run(self, db: Session, distribution: IncomeDistribution,
+                  holders: List[Tuple[int, str, float]]) -> Dict[str, int]:
+        """Create, submit and confirm payouts for a distribution"""
+        self.create_payouts(db, distribution, holders)
+        await self.submit_pending(db, distribution)
+        await self.confirm_submitted(db, distribution)
+        self.advance_cursor(db, distribution)
+        db.commit()
+        
+        statuses = [status for (status,) in db.query(IncomePayout.status).filter(
+            IncomePayout.distribution_id == distribution.id
+        )]
+        return {
+            "successful": statuses.count("success"),
+            "failed": statuses.count("failed"),
+            "pending": statuses.count("pending"),
+            "in_flight": statuses.count("submitting") + statuses.count("submitted")
+        }
+
+
+# Global payout engine instance
+payout_engine = PayoutEngine()
@@ -2,45 +2,164 @@
 APScheduler service for income distribution and automated tasks
 """
 
+import asyncio
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
-from database.database import SessionLocal
-from models.models import IncomeDistribution, IncomePayout, Holding, User, Asset
-from services.hedera_service import hedera_service
+from database.database import SessionLocal, engine
+from models.models import IncomeDistribution, IncomePayout, Asset
+from services.leader_lease import LeaderLease
+from services.holder_snapshots import holder_snapshots
+from services.payout_engine import payout_engine
+import services.income_rollups  # noqa: F401  Keeps analytics rollups in step with distribution statuses
 from utils.config import settings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Distribution statuses a retry may pick up again
+RESUMABLE_STATUSES = ("scheduled", "processing", "failed", "partially_completed")
+
 
 class SchedulerService:
-    """Service for managing scheduled tasks"""
+    """Service for managing scheduled tasks
+    
+    In "asyncio" mode (the default) jobs run on a dedicated event loop in its
+    own thread, isolated from the API workers' loop, with at most
+    SCHEDULER_MAX_CONCURRENT_JOBS running at once and each bounded by
+    SCHEDULER_JOB_TIMEOUT. "background" mode keeps the thread-pool scheduler
+    and runs every job on a fresh event loop in its worker thread.
+    """
     
     def __init__(self):
         """Initialize scheduler"""
-        self.scheduler = BackgroundScheduler(timezone=settings.SCHEDULER_TIMEZONE)
+        self.mode = settings.SCHEDULER_MODE
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._job_slots: Optional[asyncio.Semaphore] = None
+        self.lease = LeaderLease("scheduler", settings.SCHEDULER_LEASE_TTL)
+        self.is_leader = False
+        self._lease_thread: Optional[threading.Thread] = None
+        self._lease_stop = threading.Event()
+        self.catchup_stats: Dict[str, Any] = {}
+        # Jobs that were due while no leader was running still execute once
+        job_defaults = {"coalesce": True, "max_instances": 1, "misfire_grace_time": None}
+        jobstores = {}
+        if settings.SCHEDULER_JOBSTORE == "sqlalchemy":
+            jobstores["default"] = SQLAlchemyJobStore(engine=engine, tablename="scheduler_jobs")
+        
+        if self.mode == "asyncio":
+            self.loop = asyncio.new_event_loop()
+            self._job_slots = asyncio.Semaphore(settings.SCHEDULER_MAX_CONCURRENT_JOBS)
+            self.scheduler = AsyncIOScheduler(
+                event_loop=self.loop,
+                timezone=settings.SCHEDULER_TIMEZONE,
+                jobstores=jobstores,
+                job_defaults=job_defaults
+            )
+        else:
+            self.scheduler = BackgroundScheduler(
+                timezone=settings.SCHEDULER_TIMEZONE,
+                executors={"default": ThreadPoolExecutor(settings.SCHEDULER_MAX_CONCURRENT_JOBS)},
+                jobstores=jobstores,
+                job_defaults=job_defaults
+            )
         self.scheduler.add_listener(self._job_listener, mask=7)  # Listen to all events
     
+    @property
+    def _job_func(self):
+        """Entry point matching the executor of the configured mode"""
+        return run_scheduled_job if self.mode == "asyncio" else run_scheduled_job_sync
+    
+    def _run_loop(self):
+        """Run the dedicated scheduler event loop until it is stopped"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
     def start(self):
-        """Start the scheduler"""
+        """Start the scheduler
+        
+        Every worker starts its scheduler paused so it can add jobs to the
+        shared job store; only the worker holding the leader lease resumes
+        it and actually runs jobs.
+        """
         if not self.scheduler.running:
-            self.scheduler.start()
-            logger.info("📅 Scheduler started successfully")
+            if self.loop is not None and not self.loop.is_running():
+                self._loop_thread = threading.Thread(
+                    target=self._run_loop, name="scheduler-loop", daemon=True
+                )
+                self._loop_thread.start()
+            
+            self.scheduler.start(paused=True)
+            logger.info(f"📅 Scheduler started successfully ({self.mode} mode)")
+            
+            self._lease_stop.clear()
+            self._lease_thread = threading.Thread(
+                target=self._maintain_lease, name="scheduler-lease", daemon=True
+            )
+            self._lease_thread.start()
+    
+    def _maintain_lease(self):
+        """Keep renewing the leader lease, resuming or pausing job execution on changes"""
+        while not self._lease_stop.is_set():
+            try:
+                leader = self.lease.try_acquire()
+            except Exception as e:
+                logger.error(f"Failed to renew scheduler lease: {e}")
+                leader = False
+            
+            if leader and not self.is_leader:
+                self.is_leader = True
+                # Schedule recurring tasks
+                self._schedule_recurring_tasks()
+                self.scheduler.resume()
+                logger.info(f"👑 {self.lease.holder} is now the scheduler leader")
+            elif not leader and self.is_leader:
+                self.is_leader = False
+                self.scheduler.pause()
+                logger.warning(f"{self.lease.holder} lost the scheduler lease")
+            elif leader:
+                # Pick up jobs other workers added to the shared job store
+                self.scheduler.wakeup()
             
-            # Schedule recurring tasks
-            self._schedule_recurring_tasks()
+            self._lease_stop.wait(settings.SCHEDULER_LEASE_RENEW_INTERVAL)
+    
+    async def _shutdown_on_loop(self):
+        """Stop the scheduler and release loop-bound clients from inside its loop"""
+        from services.mirror_service import mirror_service
+        
+        self.scheduler.shutdown(wait=False)
+        await mirror_service.close()
     
     def shutdown(self):
         """Shutdown the scheduler"""
         if self.scheduler.running:
-            self.scheduler.shutdown(wait=False)
+            self._lease_stop.set()
+            if self._lease_thread is not None:
+                self._lease_thread.join(timeout=10)
+            
+            if self.loop is not None and self.loop.is_running():
+                asyncio.run_coroutine_threadsafe(self._shutdown_on_loop(), self.loop).result(timeout=10)
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self._loop_thread.join(timeout=10)
+            else:
+                self.scheduler.shutdown(wait=False)
+            
+            if self.is_leader:
+                self.lease.release()
+                self.is_leader = False
             logger.info("📅 Scheduler stopped")
     
     @property
@@ -48,6 +167,25 @@ class SchedulerService:
         """Check if scheduler is running"""
         return self.scheduler.running
     
+    async def _run_job(self, task: str, *args):
+        """Run a scheduler task under the job concurrency limit and timeout"""
+        job = getattr(self, task)
+        timeout = settings.SCHEDULER_JOB_TIMEOUT or None
+        
+        if self._job_slots is None:
+            # Background mode: the thread pool already bounds concurrency
+            return await asyncio.wait_for(job(*args), timeout=timeout)
+        
+        async with self._job_slots:
+            return await asyncio.wait_for(job(*args), timeout=timeout)
+    
+    async def run_now(self, task: str, *args):
+        """Run a scheduler task immediately, on the scheduler loop when it is running"""
+        if self.loop is not None and self.loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self._run_job(task, *args), self.loop)
+            return await asyncio.wrap_future(future)
+        return await self._run_job(task, *args)
+    
     def _job_listener(self, event):
         """Listen to job events for logging"""
         if event.exception:
@@ -59,7 +197,8 @@ class SchedulerService:
         """Schedule recurring maintenance tasks"""
         # Process pending income distributions every hour
         self.scheduler.add_job(
-            func=self._process_pending_distributions,
+            func=self._job_func,
+            args=["_process_pending_distributions"],
             trigger=CronTrigger(minute=0),  # Every hour at minute 0
             id="process_distributions",
             name="Process Pending Income Distributions",
@@ -68,7 +207,8 @@ class SchedulerService:
         
         # Sync with Mirror Node every 30 minutes
         self.scheduler.add_job(
-            func=self._sync_mirror_node_data,
+            func=self._job_func,
+            args=["_sync_mirror_node_data"],
             trigger=CronTrigger(minute="*/30"),  # Every 30 minutes
             id="sync_mirror_node",
             name="Sync Mirror Node Data",
@@ -84,9 +224,9 @@ class SchedulerService:
             job_id = f"income_distribution_{distribution_id}"
             
             self.scheduler.add_job(
-                func=self._execute_income_distribution,
+                func=self._job_func,
                 trigger=DateTrigger(run_date=distribution_date),
-                args=[distribution_id],
+                args=["_execute_income_distribution", distribution_id],
                 id=job_id,
                 name=f"Income Distribution {distribution_id}",
                 replace_existing=True
@@ -94,14 +234,19 @@ class SchedulerService:
             
             logger.info(f"📅 Scheduled income distribution {distribution_id} for {distribution_date}")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Failed to schedule income distribution {distribution_id}: {e}")
             return False
     
-    async def _execute_income_distribution(self, distribution_id: int):
-        """Execute income distribution for a specific distribution ID"""
+    async def _execute_income_distribution(self, distribution_id: int, resume: bool = False):
+        """Execute income distribution for a specific distribution ID
+        
+        With `resume`, a distribution left processing, failed or partially
+        completed by an earlier run picks up its remaining payouts.
+        """
         db = SessionLocal()
+        distribution = None
         try:
             # Get distribution record
             distribution = db.query(IncomeDistribution).filter(
@@ -112,8 +257,9 @@ class SchedulerService:
                 logger.error(f"Distribution {distribution_id} not found")
                 return
             
-            if distribution.status != "scheduled":
-                logger.warning(f"Distribution {distribution_id} is not in scheduled status")
+            allowed_statuses = RESUMABLE_STATUSES if resume else ("scheduled",)
+            if distribution.status not in allowed_statuses:
+                logger.warning(f"Distribution {distribution_id} is not in {' or '.join(allowed_statuses)} status")
                 return
             
             # Update status to processing
@@ -130,74 +276,39 @@ class SchedulerService:
                 db.commit()
                 return
             
-            # Get all token holders for this asset
-            holdings = db.query(Holding).filter(
-                Holding.asset_id == distribution.asset_id,
-                Holding.amount > 0
-            ).all()
+            # Payouts are computed from holders frozen at first execution, so a
+            # resumed run pays exactly the same holders
+            snapshot = holder_snapshots.for_distribution(db, distribution)
+            holders = holder_snapshots.load_holders(db, snapshot.id)
             
-            if not holdings:
+            has_payouts = db.query(IncomePayout.id).filter(
+                IncomePayout.distribution_id == distribution_id
+            ).first() is not None
+            
+            if not holders and not has_payouts:
                 logger.warning(f"No token holders found for asset {distribution.asset_id}")
                 distribution.status = "completed"
                 db.commit()
                 return
             
-            # Calculate total tokens in circulation
-            total_tokens = sum(holding.amount for holding in holdings)
+            if resume:
+                await payout_engine.recover(db, distribution)
             
             # Create payout records and execute transfers
-            successful_payouts = 0
-            failed_payouts = 0
+            result = await payout_engine.run(db, distribution, holders)
+            successful_payouts = result["successful"]
+            failed_payouts = result["failed"]
+            unsettled_payouts = result["pending"] + result["in_flight"]
             
-            for holding in holdings:
-                # Calculate payout amount based on token share
-                share_percentage = holding.amount / total_tokens
-                payout_amount = distribution.total_income * share_percentage
-                
-                # Create payout record
-                payout = IncomePayout(
-                    distribution_id=distribution_id,
-                    user_id=holding.user_id,
-                    amount=payout_amount,
-                    status="pending"
+            # Update distribution status; only a fully paid distribution leaves
+            # the resumable statuses
+            if unsettled_payouts:
+                distribution.status = "processing"
+                logger.warning(
+                    f"⏳ Income distribution {distribution_id} has {unsettled_payouts} unsettled payouts, "
+                    f"resume it to finish"
                 )
-                db.add(payout)
-                db.flush()  # Get the payout ID
-                
-                # Get user wallet info
-                user = db.query(User).filter(User.id == holding.user_id).first()
-                if not user:
-                    logger.error(f"User {holding.user_id} not found")
-                    payout.status = "failed"
-                    failed_payouts += 1
-                    continue
-                
-                # Execute HBAR transfer
-                try:
-                    transfer_result = await hedera_service.transfer_hbar(
-                        from_account=settings.TREASURY_ID,
-                        to_account=user.wallet_id,
-                        amount=payout_amount,
-                        private_key=settings.TREASURY_KEY
-                    )
-                    
-                    if transfer_result.get("status") == "success":
-                        payout.transaction_id = transfer_result["transaction_id"]
-                        payout.status = "success"
-                        successful_payouts += 1
-                        logger.info(f"💸 Paid {payout_amount} HBAR to {user.wallet_id}")
-                    else:
-                        payout.status = "failed"
-                        failed_payouts += 1
-                        logger.error(f"Failed to pay {user.wallet_id}: {transfer_result.get('error')}")
-                
-                except Exception as e:
-                    logger.error(f"Error paying {user.wallet_id}: {e}")
-                    payout.status = "failed"
-                    failed_payouts += 1
-            
-            # Update distribution status
-            if failed_payouts == 0:
+            elif failed_payouts == 0:
                 distribution.status = "completed"
                 logger.info(f"✅ Income distribution {distribution_id} completed successfully")
             elif successful_payouts > 0:
@@ -208,55 +319,111 @@ class SchedulerService:
                 logger.error(f"❌ Income distribution {distribution_id} failed completely")
             
             db.commit()
-            
+        
         except Exception as e:
             logger.error(f"Error executing income distribution {distribution_id}: {e}")
             if distribution:
+                db.rollback()
                 distribution.status = "failed"
                 db.commit()
         finally:
             db.close()
     
     async def _process_pending_distributions(self):
-        """Process any pending income distributions"""
+        """Process any pending income distributions
+        
+        Overdue distributions of different assets run in parallel, up to
+        DISTRIBUTION_CATCHUP_CONCURRENCY assets at a time; distributions of the
+        same asset still run one after another in date order. Distributions
+        left processing for longer than SCHEDULER_JOB_TIMEOUT were cut off by
+        the timeout or a dead worker, so they are resumed as well.
+        """
         db = SessionLocal()
         try:
             # Find distributions that should have been processed
             now = datetime.utcnow()
-            pending_distributions = db.query(IncomeDistribution).filter(
-                IncomeDistribution.status == "scheduled",
+            due = IncomeDistribution.status == "scheduled"
+            if settings.SCHEDULER_JOB_TIMEOUT:
+                stale_before = now - timedelta(seconds=settings.SCHEDULER_JOB_TIMEOUT)
+                due = or_(due, and_(
+                    IncomeDistribution.status == "processing",
+                    func.coalesce(IncomeDistribution.updated_at, IncomeDistribution.created_at) < stale_before
+                ))
+            pending_distributions = db.query(
+                IncomeDistribution.id, IncomeDistribution.asset_id, IncomeDistribution.status
+            ).filter(
+                due,
                 IncomeDistribution.distribution_date <= now
-            ).all()
-            
-            for distribution in pending_distributions:
-                logger.info(f"Processing overdue distribution {distribution.id}")
-                await self._execute_income_distribution(distribution.id)
-                
+            ).order_by(IncomeDistribution.distribution_date, IncomeDistribution.id).all()
         except Exception as e:
             logger.error(f"Error processing pending distributions: {e}")
+            return
         finally:
             db.close()
+        
+        by_asset: Dict[int, List[Tuple[int, bool]]] = {}
+        for distribution_id, asset_id, distribution_status in pending_distributions:
+            by_asset.setdefault(asset_id, []).append((distribution_id, distribution_status == "processing"))
+        
+        self.catchup_stats = {
+            "backlog": len(pending_distributions),
+            "assets": len(by_asset),
+            "processed": 0,
+            "started_at": datetime.utcnow().isoformat(),
+            "drain_rate_per_minute": 0.0,
+            "concurrency": settings.DISTRIBUTION_CATCHUP_CONCURRENCY
+        }
+        if not pending_distributions:
+            return
+        
+        logger.info(
+            f"Catching up {len(pending_distributions)} overdue distributions "
+            f"across {len(by_asset)} assets"
+        )
+        started = time.monotonic()
+        asset_slots = asyncio.Semaphore(settings.DISTRIBUTION_CATCHUP_CONCURRENCY)
+        
+        async def drain_asset(distributions: List[Tuple[int, bool]]):
+            async with asset_slots:
+                for distribution_id, resume in distributions:
+                    logger.info(f"Processing overdue distribution {distribution_id}")
+                    await self._execute_income_distribution(distribution_id, resume=resume)
+                    
+                    self.catchup_stats["processed"] += 1
+                    self.catchup_stats["backlog"] -= 1
+                    elapsed_minutes = (time.monotonic() - started) / 60
+                    if elapsed_minutes > 0:
+                        self.catchup_stats["drain_rate_per_minute"] = \
+                            self.catchup_stats["processed"] / elapsed_minutes
+        
+        results = await asyncio.gather(
+            *(drain_asset(distributions) for distributions in by_asset.values()),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error processing pending distributions: {result}")
+        
+        logger.info(
+            f"Distribution catch-up finished: {self.catchup_stats['processed']} processed, "
+            f"{self.catchup_stats['drain_rate_per_minute']:.1f}/min"
+        )
     
     async def _sync_mirror_node_data(self):
-        """Sync data with Mirror Node for verification"""
-        db = SessionLocal()
+        """Incrementally index Mirror Node data and reconcile pending transactions"""
         try:
-            # Get recent transactions that need verification
-            from services.mirror_service import mirror_service
+            from services.mirror_indexer import mirror_indexer
             
-            # This is a placeholder for Mirror Node sync logic
-            # In a real implementation, you would:
-            # 1. Query recent transactions from Mirror Node
-            # 2. Verify against local database
-            # 3. Update transaction statuses
-            # 4. Log any discrepancies
-            
-            logger.info("🔄 Mirror Node sync completed")
+            summary = await mirror_indexer.sync_all()
             
+            logger.info(
+                f"🔄 Mirror Node sync completed: {summary['indexed_transactions']} new transactions "
+                f"across {summary['accounts']} accounts, "
+                f"{summary['reconciled_transactions']} pending transactions reconciled"
+            )
+        
         except Exception as e:
             logger.error(f"Error syncing with Mirror Node: {e}")
-        finally:
-            db.close()
     
     def get_scheduled_jobs(self) -> List[Dict[str, Any]]:
         """Get list of scheduled jobs"""
@@ -281,5 +448,15 @@ class SchedulerService:
             return False
 
 
+async def run_scheduled_job(task: str, *args):
+    """Job entry point for the asyncio scheduler, resolving the task by name"""
+    return await scheduler._run_job(task, *args)
+
+
+def run_scheduled_job_sync(task: str, *args):
+    """Job entry point for the thread-pool scheduler, on a per-job event loop"""
+    return asyncio.run(scheduler._run_job(task, *args))
+
+
 # Global scheduler instance
 scheduler = SchedulerService()
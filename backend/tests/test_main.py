@@ -6,11 +6,13 @@ import pytest
 import asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from unittest.mock import patch, AsyncMock
 
 from main import app
-from database.database import get_db, Base
+from database.database import get_db, get_async_db, get_read_db, to_async_url, Base
+from database.migrations import upgrade_database
 from models.models import User, Asset
 from utils.config import settings
 
@@ -18,9 +20,13 @@ from utils.config import settings
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL))
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 # Create test database
-Base.metadata.create_all(bind=engine)
+upgrade_database(SQLALCHEMY_DATABASE_URL)
 
 
 def override_get_db():
@@ -32,7 +38,15 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override async database dependency for testing"""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_read_db] = override_get_async_db
 
 client = TestClient(app)
 
@@ -56,6 +70,7 @@ class TestAPI:
         assert data["status"] == "healthy"
         assert "database" in data
         assert "scheduler" in data
+        assert data["database_pool"]["pool"]
     
     @patch('services.hedera_service.hedera_service.create_sponsored_account')
     def test_create_wallet(self, mock_create_account):
@@ -149,6 +164,132 @@ class TestAPI:
         assert data["success"] is True
         assert "assets" in data["data"]
     
+    def test_list_assets_pages_by_cursor(self, test_user):
+        """Test asset listing walks keyset pages and reports the maintained total"""
+        from models.models import AssetTypeCount
+        from services.asset_catalog import asset_catalog
+        
+        db = TestingSessionLocal()
+        assets = []
+        for index in range(3):
+            asset = Asset(
+                nft_id=f"0.0.pagenft{index}", ft_id=f"0.0.pageft{index}", asset_type="pagination",
+                name=f"Page Asset {index}", valuation=1000.0, creator_id=test_user.id
+            )
+            db.add(asset)
+            db.flush()
+            asset_catalog.record_created(db, asset.asset_type)
+            assets.append(asset)
+        db.commit()
+        
+        first = client.get("/api/v1/assets/list", params={"asset_type": "pagination", "limit": 2}).json()["data"]
+        assert first["total"] == 3
+        assert [asset["id"] for asset in first["assets"]] == [assets[2].id, assets[1].id]
+        
+        second = client.get("/api/v1/assets/list", params={
+            "asset_type": "pagination", "limit": 2, "cursor": first["next_cursor"]
+        }).json()["data"]
+        assert [asset["id"] for asset in second["assets"]] == [assets[0].id]
+        assert second["next_cursor"] is None
+        
+        assert client.get("/api/v1/assets/list", params={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.get("/api/v1/assets/list", params={"limit": 0}).status_code == 422
+        assert client.get("/api/v1/assets/list", params={"limit": 501}).status_code == 422
+        
+        for asset in assets:
+            db.delete(asset)
+        db.query(AssetTypeCount).filter(AssetTypeCount.asset_type == "pagination").delete()
+        db.commit()
+        db.close()
+    
+    def test_asset_holders_are_aggregated_and_paged(self, test_user, test_asset):
+        """Test asset detail reports rollup aggregates and holders page by balance without snapshots"""
+        from models.models import AssetIncomeRollup, Holding, HolderSnapshot
+        from services.holding_ledger import holding_ledger
+        
+        db = TestingSessionLocal()
+        holders = [test_user] + [
+            User(wallet_id=f"0.0.holder{index}", public_key=f"holder_key_{index}") for index in range(2)
+        ]
+        db.add_all(holders[1:])
+        db.flush()
+        for holder, amount in zip(holders, [500.0, 300.0, 200.0]):
+            holding_ledger.credit(db, holder.id, test_asset.id, test_asset.ft_id, amount)
+        db.commit()
+        
+        detail = client.get(f"/api/v1/assets/{test_asset.id}", params={"top": 2}).json()["data"]
+        assert detail["holder_count"] == 3
+        assert detail["tokens_in_circulation"] == 1000.0
+        assert [holder["tokens_held"] for holder in detail["top_holders"]] == [500.0, 300.0]
+        assert detail["concentration"]["largest_holder_share"] == 0.5
+        assert detail["concentration"]["top_holders_share"] == 0.8
+        assert detail["concentration"]["herfindahl_index"] == pytest.approx(0.38)
+        
+        first = client.get(f"/api/v1/assets/{test_asset.id}/holders", params={"limit": 2}).json()["data"]
+        assert [holder["wallet_id"] for holder in first["holders"]] == ["0.0.testuser", "0.0.holder0"]
+        second = client.get(f"/api/v1/assets/{test_asset.id}/holders", params={
+            "limit": 2, "cursor": first["next_cursor"]
+        }).json()["data"]
+        assert [holder["wallet_id"] for holder in second["holders"]] == ["0.0.holder1"]
+        assert second["next_cursor"] is None
+        
+        assert first["holder_count"] == 3
+        
+        assert client.get(f"/api/v1/assets/{test_asset.id}", params={"top": 0}).status_code == 422
+        assert client.get(f"/api/v1/assets/{test_asset.id}/holders", params={"limit": 501}).status_code == 422
+        assert client.get(f"/api/v1/assets/{test_asset.id}/holders", params={"cursor": "bad"}).status_code == 400
+        
+        # Reads never take holder snapshots
+        assert db.query(HolderSnapshot).count() == 0
+        
+        db.query(Holding).delete()
+        db.query(AssetIncomeRollup).delete()
+        for holder in holders[1:]:
+            db.delete(holder)
+        db.commit()
+        db.close()
+    
+    def test_income_analytics_follow_distributions_and_holdings(self, test_user, test_asset):
+        """Test the analytics rollup moves with distribution statuses and holding changes"""
+        from datetime import datetime
+        from models.models import AssetIncomeRollup, IncomeDistribution
+        from services.holding_ledger import holding_ledger
+        
+        db = TestingSessionLocal()
+        distribution = IncomeDistribution(
+            asset_id=test_asset.id, total_income=100.0, distribution_date=datetime.utcnow()
+        )
+        db.add(distribution)
+        holding_ledger.credit(db, test_user.id, test_asset.id, test_asset.ft_id, 60.0)
+        db.commit()
+        
+        analytics = client.get(f"/api/v1/rewards/analytics/asset/{test_asset.id}").json()["data"]
+        assert analytics["total_income_scheduled"] == 100.0
+        assert analytics["total_income_distributed"] == 0.0
+        assert analytics["total_holders"] == 1
+        assert analytics["tokens_in_circulation"] == 60.0
+        
+        distribution.status = "completed"
+        holding_ledger.debit(db, test_user.id, test_asset.id, 60.0)
+        db.commit()
+        
+        analytics = client.get(f"/api/v1/rewards/analytics/asset/{test_asset.id}").json()["data"]
+        assert analytics["total_distributions"] == 1
+        assert analytics["completed_distributions"] == 1
+        assert analytics["total_income_scheduled"] == 0.0
+        assert analytics["total_income_distributed"] == 100.0
+        assert analytics["yield_percentage"] == 100.0 / test_asset.valuation * 100
+        assert analytics["total_holders"] == 0
+        assert analytics["tokens_in_circulation"] == 0.0
+        
+        db.delete(distribution)
+        db.commit()
+        rollup = db.get(AssetIncomeRollup, test_asset.id)
+        assert (rollup.distribution_count, rollup.completed_count, rollup.distributed_total) == (0, 0, 0.0)
+        db.delete(rollup)
+        db.commit()
+        db.close()
+    
     def test_get_nonexistent_asset(self):
         """Test getting non-existent asset"""
         response = client.get("/api/v1/assets/99999")
@@ -192,11 +333,134 @@ class TestAPI:
         data = response.json()
         assert data["success"] is True
         assert len(data["data"]["transactions"]) == 1
+    
+    def test_stream_account_transactions(self):
+        """Test full-history NDJSON streaming follows Mirror Node next links"""
+        import json
+        
+        pages = {
+            "/accounts/0.0.123456/transactions": {
+                "transactions": [{"transaction_id": "tx1", "name": "CRYPTOTRANSFER"}],
+                "links": {"next": "/api/v1/accounts/0.0.123456/transactions?timestamp=lt:1.0"}
+            },
+            "/api/v1/accounts/0.0.123456/transactions?timestamp=lt:1.0": {
+                "transactions": [{"transaction_id": "tx2", "name": "CRYPTOTRANSFER"}],
+                "links": {"next": None}
+            }
+        }
+        
+        async def fake_get(path, params=None, ttl=0):
+            return pages[path]
+        
+        with patch('services.mirror_service.mirror_service._get', side_effect=fake_get):
+            response = client.get("/api/v1/mirror/transactions/0.0.123456/stream")
+        
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["transaction_id"] for line in lines] == ["tx1", "tx2"]
+    
+    def test_portfolio_returns_sections_that_succeed(self):
+        """Test a portfolio with a failing and a slow section still returns the rest as partial"""
+        async def hang(account_id, limit=10):
+            await asyncio.sleep(1)
+        
+        with patch('services.mirror_service.mirror_service.get_account_info',
+                   AsyncMock(return_value={"balance": {"balance": 500}})), \
+                patch('services.mirror_service.mirror_service.get_token_balances',
+                      AsyncMock(side_effect=RuntimeError("connection reset"))), \
+                patch('services.mirror_service.mirror_service.get_account_transactions', side_effect=hang), \
+                patch.object(settings, "MIRROR_PORTFOLIO_SECTION_TIMEOUT", 0.05):
+            response = client.get("/api/v1/mirror/portfolio/0.0.portfolio")
+        
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["balance"] == 500
+        assert data["partial"] is True
+        assert data["errors"] == {
+            "tokens": "connection reset",
+            "recent_transactions": "Mirror Node request timed out"
+        }
+        assert data["tokens"] == [] and data["recent_transactions"] == []
+    
+    def test_income_proof_pages_distinct_transactions(self, test_user, test_asset):
+        """Test batched payouts share one proof and racing proof inserts are ignored"""
+        from datetime import datetime
+        from models.models import AssetIncomeRollup, IncomeDistribution, IncomePayout, TransactionProof
+        
+        db = TestingSessionLocal()
+        distribution = IncomeDistribution(
+            asset_id=test_asset.id, total_income=30.0, distribution_date=datetime.utcnow()
+        )
+        db.add(distribution)
+        db.flush()
+        for transaction_id in ["0.0.2@1.1", "0.0.2@1.1", "0.0.2@2.2"]:
+            db.add(IncomePayout(
+                distribution_id=distribution.id, user_id=test_user.id, amount=10.0,
+                transaction_id=transaction_id, status="success"
+            ))
+        db.commit()
+        
+        def proof(transaction_id):
+            return {
+                "transaction_id": transaction_id, "consensus_timestamp": "1.1", "result": "SUCCESS",
+                "transfers": [], "token_transfers": []
+            }
+        
+        async def fetch_proofs(transaction_ids):
+            # Another request stores one of the proofs while this one is fetching
+            racing = TestingSessionLocal()
+            racing.add(TransactionProof(**proof(transaction_ids[0])))
+            racing.commit()
+            racing.close()
+            return {"proofs": [proof(tx_id) for tx_id in transaction_ids], "total": len(transaction_ids)}
+        
+        with patch('services.mirror_service.mirror_service.get_income_distribution_proof',
+                   side_effect=fetch_proofs) as mock_fetch:
+            response = client.get(f"/api/v1/mirror/income-proof/{distribution.id}")
+        
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["total"] == 2
+        assert [p["transaction_id"] for p in data["proofs"]] == ["0.0.2@1.1", "0.0.2@2.2"]
+        mock_fetch.assert_called_once_with(["0.0.2@1.1", "0.0.2@2.2"])
+        assert db.query(TransactionProof).count() == 2
+        
+        assert client.get(f"/api/v1/mirror/income-proof/{distribution.id}?limit=0").status_code == 422
+        
+        db.query(TransactionProof).delete()
+        db.query(IncomePayout).delete()
+        db.delete(distribution)
+        db.commit()
+        db.query(AssetIncomeRollup).delete()
+        db.commit()
+        db.close()
 
 
 class TestServices:
     """Test class for service functions"""
     
+    def test_transaction_receipt_reports_consensus_failures(self):
+        """Test a receipt with a non-SUCCESS status is reported as a failed transfer"""
+        from types import SimpleNamespace
+        from unittest.mock import MagicMock
+        from services.hedera_service import hedera_service
+        
+        statuses = SimpleNamespace(SUCCESS="SUCCESS")
+        query = MagicMock()
+        query.return_value.set_transaction_id.return_value.execute_async = AsyncMock(
+            side_effect=[SimpleNamespace(status="INSUFFICIENT_PAYER_BALANCE"), SimpleNamespace(status="SUCCESS")]
+        )
+        
+        with patch("services.hedera_service.TransactionReceiptQuery", query), \
+                patch("services.hedera_service.TransactionId"), \
+                patch("services.hedera_service.Status", statuses):
+            failed = asyncio.run(hedera_service.get_transaction_receipt("0.0.2@1700000000.000000000"))
+            succeeded = asyncio.run(hedera_service.get_transaction_receipt("0.0.2@1700000000.000000000"))
+        
+        assert failed["status"] == "failed"
+        assert "INSUFFICIENT_PAYER_BALANCE" in failed["error"]
+        assert succeeded["status"] == "success"
+    
     def test_hedera_service_key_generation(self):
         """Test Hedera service key generation"""
         from services.hedera_service import HederaService
@@ -237,6 +501,229 @@ class TestServices:
         assert formatted["transaction_id"] == raw_transaction["transaction_id"]
         assert formatted["type"] == "CRYPTOTRANSFER"
         assert formatted["result"] == "SUCCESS"
+    
+    def test_mirror_transaction_id_conversion(self):
+        """Test SDK transaction IDs are converted to Mirror Node format"""
+        from services.mirror_service import MirrorNodeService
+        
+        assert MirrorNodeService.to_mirror_transaction_id(
+            "0.0.123456@1234567890.123456789"
+        ) == "0.0.123456-1234567890-123456789"
+        assert MirrorNodeService.to_mirror_transaction_id(
+            "0.0.123456-1234567890-123456789"
+        ) == "0.0.123456-1234567890-123456789"
+    
+    def test_income_proof_queries_mirror_transaction_ids(self):
+        """Test income proofs look up payouts by Mirror Node ID but report the stored ID"""
+        from services.mirror_service import mirror_service
+        
+        record = {"transactions": [{"consensus_timestamp": "1.1", "result": "SUCCESS"}]}
+        with patch.object(mirror_service, "get_transaction_info",
+                          AsyncMock(return_value=record)) as mock_info:
+            result = asyncio.run(mirror_service.get_income_distribution_proof(["0.0.2@1.5"]))
+        
+        mock_info.assert_called_once_with("0.0.2-1-5")
+        assert result["proofs"][0]["transaction_id"] == "0.0.2@1.5"
+        assert result["proofs"][0]["result"] == "SUCCESS"
+    
+    def test_async_database_url(self):
+        """Test sync database URLs map to their async drivers"""
+        assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+        assert to_async_url("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+        assert to_async_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    
+    def test_read_your_writes_window(self):
+        """Test clients that just wrote are routed to the primary database"""
+        from fastapi import Response
+        from starlette.requests import Request
+        from database.database import READ_PRIMARY_HEADER, read_your_writes, reads_from_primary
+        
+        response = Response()
+        read_your_writes(response)
+        until = response.headers[READ_PRIMARY_HEADER]
+        
+        recent_writer = Request({"type": "http", "headers": [(READ_PRIMARY_HEADER.lower().encode(), until.encode())]})
+        assert reads_from_primary(recent_writer)
+        assert not reads_from_primary(Request({"type": "http", "headers": []}))
+    
+    def test_mirror_service_url_resolution(self):
+        """Test Mirror Node paths and next-page links resolve against the base URL"""
+        from services.mirror_service import MirrorNodeService
+        
+        service = MirrorNodeService()
+        service.base_url = "https://testnet.mirrornode.hedera.com/api/v1"
+        
+        assert service._build_url("/accounts/0.0.1") == \
+            "https://testnet.mirrornode.hedera.com/api/v1/accounts/0.0.1"
+        assert service._build_url("/api/v1/transactions?limit=25&timestamp=lt:1.2") == \
+            "https://testnet.mirrornode.hedera.com/api/v1/transactions?limit=25&timestamp=lt:1.2"
+    
+    def test_asset_related_transactions_merge(self):
+        """Test per-token pages are merged newest first and de-duplicated"""
+        from services.mirror_service import MirrorNodeService
+        
+        pages = {
+            "0.0.ft1": [{"transaction_id": "a", "consensus_timestamp": "1700000003.0"},
+                        {"transaction_id": "c", "consensus_timestamp": "1700000001.0"}],
+            "0.0.nft1": [{"transaction_id": "b", "consensus_timestamp": "1700000002.5"},
+                         {"transaction_id": "c", "consensus_timestamp": "1700000001.0"}],
+        }
+        
+        async def fake_search(account_id, token_id=None, limit=25, transaction_type=None):
+            return {"transactions": pages[token_id][:limit]}
+        
+        service = MirrorNodeService()
+        with patch.object(service, "search_transactions", side_effect=fake_search):
+            result = asyncio.run(service.get_asset_related_transactions(
+                "0.0.123456", ["0.0.ft1", "0.0.nft1"], limit=25
+            ))
+        
+        assert [tx["transaction_id"] for tx in result["transactions"]] == ["a", "b", "c"]
+        assert result["total"] == 4
+    
+    def test_response_cache_single_flight_and_lru(self):
+        """Test the response cache coalesces concurrent loads and evicts by size"""
+        from utils.cache import TTLCache
+        
+        cache = TTLCache(max_bytes=100, sizeof=lambda value: 40)
+        calls = []
+        
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"token_id": "0.0.1"}
+        
+        async def load_concurrently():
+            return await asyncio.gather(*(cache.get_or_load("a", loader, ttl=60) for _ in range(5)))
+        
+        results = asyncio.run(load_concurrently())
+        assert len(calls) == 1
+        assert all(result == {"token_id": "0.0.1"} for result in results)
+        
+        cache.set("b", {}, ttl=60)
+        cache.set("c", {}, ttl=60)
+        assert cache.get("a") is None  # Least recently used entry evicted
+        assert cache.stats()["evictions"] == 1
+    
+    def test_response_cache_survives_cancelled_leader(self):
+        """Test cancelling the caller that started a load does not fail coalesced waiters"""
+        from utils.cache import TTLCache
+        
+        cache = TTLCache(max_bytes=100, sizeof=lambda value: 1)
+        
+        async def loader():
+            await asyncio.sleep(0.01)
+            return "loaded"
+        
+        async def cancel_leader():
+            leader = asyncio.ensure_future(cache.get_or_load("a", loader, ttl=60))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(cache.get_or_load("a", loader, ttl=60))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return leader, await waiter
+        
+        leader, result = asyncio.run(cancel_leader())
+        assert leader.cancelled()
+        assert result == "loaded"
+        assert cache.get("a") == "loaded"
+        assert cache.stats()["coalesced"] == 1
+    
+    def test_mirror_indexer_resumes_from_checkpoint(self):
+        """Test an interrupted sync resumes after its last page and stale indexes are read live"""
+        from datetime import datetime, timedelta
+        from models.models import MirrorSyncCheckpoint, MirrorTransaction
+        from services.mirror_indexer import mirror_indexer
+        from services.mirror_service import mirror_service
+        
+        account_id = "0.0.indexed"
+        pages = [
+            [{"transaction_id": f"0.0.2-1-{n}", "consensus_timestamp": f"170000000{n}.000000000",
+              "result": "SUCCESS", "token_transfers": [{"token_id": "0.0.ft1"}]} for n in (1, 2)],
+            [{"transaction_id": "0.0.2-1-3", "consensus_timestamp": "1700000003.000000000",
+              "result": "SUCCESS"}]
+        ]
+        calls = []
+        
+        def fake_pages(interrupt):
+            async def iter_pages(path, params=None):
+                calls.append(params)
+                if params.get("timestamp"):
+                    yield pages[1]
+                    return
+                yield pages[0]
+                if interrupt:
+                    raise RuntimeError("connection reset")
+            return iter_pages
+        
+        db = TestingSessionLocal()
+        with patch.object(mirror_service, "iter_pages", fake_pages(interrupt=True)):
+            with pytest.raises(RuntimeError):
+                asyncio.run(mirror_indexer.sync_account(db, account_id))
+        
+        checkpoint = mirror_indexer.get_checkpoint(db, account_id)
+        assert checkpoint.last_consensus_timestamp == "1700000002.000000000"
+        assert not mirror_indexer.is_fresh(db, account_id)
+        
+        with patch.object(mirror_service, "iter_pages", fake_pages(interrupt=False)):
+            assert asyncio.run(mirror_indexer.sync_account(db, account_id)) == 1
+        
+        assert calls[1]["timestamp"] == "gt:1700000002.000000000"
+        assert mirror_indexer.is_fresh(db, account_id)
+        assert [tx["transaction_id"] for tx in mirror_indexer.query_asset_transactions(
+            db, account_id, ["0.0.ft1"]
+        )] == ["0.0.2-1-2", "0.0.2-1-1"]
+        
+        with patch('services.mirror_service.mirror_service.get_account_transactions',
+                   new_callable=AsyncMock, return_value={"transactions": []}) as mock_live:
+            indexed = client.get(f"/api/v1/mirror/transactions/{account_id}").json()["data"]
+            assert len(indexed["transactions"]) == 3
+            mock_live.assert_not_called()
+            
+            checkpoint.last_synced_at = datetime.utcnow() - timedelta(seconds=settings.MIRROR_INDEX_MAX_AGE + 60)
+            db.commit()
+            client.get(f"/api/v1/mirror/transactions/{account_id}")
+            mock_live.assert_called_once()
+        
+        for row in db.query(MirrorTransaction).filter(MirrorTransaction.account_id == account_id):
+            db.delete(row)
+        db.query(MirrorSyncCheckpoint).delete()
+        db.commit()
+        db.close()
+    
+    def test_reconcile_pending_transactions(self, test_user):
+        """Test pending transactions resolve from the index first, then from direct lookups"""
+        from models.models import MirrorTransaction, Transaction
+        from services.mirror_indexer import mirror_indexer
+        from services.mirror_service import mirror_service
+        
+        db = TestingSessionLocal()
+        for n in (1, 2, 3):
+            db.add(Transaction(
+                user_id=test_user.id, transaction_id=f"0.0.2@10.{n}", transaction_type="transfer"
+            ))
+        db.add(MirrorTransaction(
+            account_id="0.0.2", transaction_id="0.0.2-10-1", consensus_timestamp="10.000000001",
+            result="SUCCESS", data={}
+        ))
+        db.commit()
+        
+        lookups = {
+            "0.0.2-10-2": {"transactions": [{"result": "INSUFFICIENT_PAYER_BALANCE"}]},
+            "0.0.2-10-3": {"error": "Not found", "status": "failed"}
+        }
+        with patch.object(mirror_service, "get_transaction_info",
+                          AsyncMock(side_effect=lambda mirror_id: lookups[mirror_id])) as mock_info:
+            assert asyncio.run(mirror_indexer.reconcile_pending_transactions(db)) == 2
+        
+        assert sorted(call.args[0] for call in mock_info.call_args_list) == ["0.0.2-10-2", "0.0.2-10-3"]
+        statuses = dict(db.query(Transaction.transaction_id, Transaction.status))
+        assert statuses == {"0.0.2@10.1": "success", "0.0.2@10.2": "failed", "0.0.2@10.3": "pending"}
+        
+        db.query(Transaction).delete()
+        db.query(MirrorTransaction).delete()
+        db.commit()
+        db.close()
 
 
 class TestModels:
@@ -299,6 +786,171 @@ class TestModels:
         assert queried_asset.creator_id == user.id
         
         db.close()
+    
+    def test_holder_snapshot_freezes_balances(self, test_user, test_asset):
+        """Test holder snapshots aggregate holdings and are not affected by later changes"""
+        from models.models import Holding, HolderSnapshot, HolderSnapshotEntry
+        from services.holder_snapshots import holder_snapshots
+        
+        db = TestingSessionLocal()
+        holding = Holding(user_id=test_user.id, asset_id=test_asset.id, ft_id=test_asset.ft_id, amount=40.0)
+        db.add(holding)
+        db.commit()
+        
+        snapshot = holder_snapshots.take(db, test_asset.id)
+        assert snapshot.holder_count == 1
+        assert snapshot.total_amount == 40.0
+        
+        holding.amount = 100.0
+        db.commit()
+        
+        assert holder_snapshots.load_holders(db, snapshot.id) == [(test_user.id, test_user.wallet_id, 40.0)]
+        assert holder_snapshots.take(db, test_asset.id).total_amount == 100.0
+        
+        db.query(HolderSnapshotEntry).delete()
+        db.query(HolderSnapshot).delete()
+        db.delete(holding)
+        db.commit()
+        db.close()
+    
+    def test_holding_ledger_keeps_one_row_per_holder(self, test_user, test_asset):
+        """Test holding credits upsert into a single row and debits remove empty holdings"""
+        from models.models import AssetIncomeRollup, Holding
+        from services.holding_ledger import holding_ledger
+        
+        db = TestingSessionLocal()
+        holding_ledger.credit(db, test_user.id, test_asset.id, test_asset.ft_id, 25.0)
+        holding_ledger.credit(db, test_user.id, test_asset.id, test_asset.ft_id, 15.0)
+        db.commit()
+        
+        holdings = db.query(Holding).filter(Holding.user_id == test_user.id).all()
+        assert [holding.amount for holding in holdings] == [40.0]
+        
+        holding_ledger.debit(db, test_user.id, test_asset.id, 10.0)
+        db.commit()
+        db.refresh(holdings[0])
+        assert holdings[0].amount == 30.0
+        
+        holding_ledger.debit(db, test_user.id, test_asset.id, 30.0)
+        db.commit()
+        assert db.query(Holding).filter(Holding.user_id == test_user.id).count() == 0
+        
+        # A leftover overdrawn row is not a holder until a credit makes it positive
+        db.add(Holding(user_id=test_user.id, asset_id=test_asset.id, ft_id=test_asset.ft_id, amount=-2.0))
+        db.commit()
+        holding_ledger.credit(db, test_user.id, test_asset.id, test_asset.ft_id, 5.0)
+        db.commit()
+        rollup = db.get(AssetIncomeRollup, test_asset.id)
+        assert (rollup.holder_count, rollup.circulating_supply) == (1, 3.0)
+        
+        holding_ledger.debit(db, test_user.id, test_asset.id, 3.0)
+        db.commit()
+        db.refresh(rollup)
+        assert (rollup.holder_count, rollup.circulating_supply) == (0, 0.0)
+        
+        db.query(AssetIncomeRollup).delete()
+        db.commit()
+        db.close()
+    
+    def test_current_user_is_cached_until_invalidated(self, test_user):
+        """Test principals are served from cache per token and refreshed after invalidation"""
+        from fastapi.security import HTTPAuthorizationCredentials
+        from utils.auth import create_user_token, get_current_user, invalidate_principal
+        
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_user_token(test_user))
+        db = TestingSessionLocal()
+        assert asyncio.run(get_current_user(credentials, db)).kyc_verified is True
+        
+        writer = TestingSessionLocal()
+        writer.query(User).filter(User.id == test_user.id).update({"kyc_verified": False})
+        writer.commit()
+        writer.close()
+        
+        db.close()
+        db = TestingSessionLocal()
+        cached = asyncio.run(get_current_user(credentials, db))
+        assert cached.id == test_user.id
+        assert cached.kyc_verified is True
+        
+        invalidate_principal(test_user.id)
+        db.close()
+        db = TestingSessionLocal()
+        assert asyncio.run(get_current_user(credentials, db)).kyc_verified is False
+        db.close()
+    
+    def test_auth_crypto_runs_off_the_event_loop(self):
+        """Test JWT verification runs on the auth executor"""
+        import threading
+        from utils.auth import create_access_token, run_cpu_bound, verify_token_async
+        
+        async def check():
+            assert (await run_cpu_bound(lambda: threading.current_thread().name)).startswith("auth-cpu")
+            assert (await verify_token_async(create_access_token({"sub": "0.0.1"})))["sub"] == "0.0.1"
+            assert await verify_token_async("not-a-token") is None
+        
+        asyncio.run(check())
+
+
+class TestMigrations:
+    """Test class for schema migrations and query plans"""
+    
+    # Hot query shapes and the index each one must be served by
+    HOT_QUERIES = [
+        ("SELECT user_id, amount FROM holdings WHERE asset_id = 1 AND amount > 0",
+         "ix_holdings_asset_amount_user"),
+        ("SELECT id FROM holdings WHERE user_id = 1 AND asset_id = 1",
+         "uq_holdings_user_asset"),
+        ("SELECT id FROM income_payouts WHERE distribution_id = 1 AND status = 'pending'",
+         "ix_income_payouts_distribution_status"),
+        ("SELECT id FROM income_payouts WHERE user_id = 1",
+         "ix_income_payouts_user"),
+        ("SELECT id FROM income_distributions WHERE status = 'scheduled' AND distribution_date <= '2030-01-01'",
+         "ix_income_distributions_status_date"),
+        ("SELECT id FROM kyc_submissions WHERE user_id = 1 AND verification_status = 'pending'",
+         "ix_kyc_submissions_user_status"),
+        ("SELECT id FROM transactions WHERE user_id = 1 ORDER BY created_at DESC",
+         "ix_transactions_user_created"),
+        ("SELECT id FROM assets WHERE (created_at, id) < ('2030-01-01', 10) "
+         "ORDER BY created_at DESC, id DESC LIMIT 100",
+         "ix_assets_created_id"),
+        ("SELECT id FROM assets WHERE asset_type = 'art' AND (created_at, id) < ('2030-01-01', 10) "
+         "ORDER BY created_at DESC, id DESC LIMIT 100",
+         "ix_assets_type_created_id"),
+        ("SELECT user_id FROM holdings WHERE asset_id = 1 AND (amount, user_id) < (10.0, 5) "
+         "ORDER BY amount DESC, user_id DESC LIMIT 100",
+         "ix_holdings_asset_amount_user"),
+    ]
+    
+    def test_models_match_migrations(self):
+        """Test the migrated schema has every table, column and index the models declare"""
+        from alembic.autogenerate import compare_metadata
+        from alembic.migration import MigrationContext
+        from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+        from database.migrations import include_object
+        
+        # The scheduler's job store creates its own table next to the migrated ones
+        jobs_table = SQLAlchemyJobStore(engine=engine, tablename="scheduler_jobs").jobs_t
+        jobs_table.create(engine, checkfirst=True)
+        try:
+            with engine.connect() as connection:
+                diff = compare_metadata(
+                    MigrationContext.configure(connection, opts={"include_object": include_object}),
+                    Base.metadata
+                )
+        finally:
+            jobs_table.drop(engine)
+        
+        assert diff == []
+    
+    def test_hot_queries_use_indexes(self):
+        """Test hot query paths are index searches rather than full table scans"""
+        from sqlalchemy import text
+        
+        with engine.connect() as connection:
+            for query, index_name in self.HOT_QUERIES:
+                plan = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {query}"))]
+                assert any(index_name in step for step in plan), (query, plan)
+                assert not any(step.startswith("SCAN") or "TEMP B-TREE" in step for step in plan), (query, plan)
 
 
 class TestScheduler:
@@ -312,6 +964,395 @@ class TestScheduler:
         assert scheduler is not None
         assert hasattr(scheduler, 'scheduler')
     
+    def test_expired_lease_is_taken_over(self):
+        """Test a second worker takes the lease only once the leader stops renewing it"""
+        from datetime import datetime, timedelta
+        from models.models import SchedulerLease
+        from services.leader_lease import LeaderLease
+        
+        first = LeaderLease("test-lease", ttl_seconds=60)
+        second = LeaderLease("test-lease", ttl_seconds=60)
+        db = TestingSessionLocal()
+        with patch("services.leader_lease.SessionLocal", TestingSessionLocal):
+            assert first.try_acquire()
+            assert not second.try_acquire()
+            assert first.try_acquire()  # Renewal keeps the lease
+            
+            # The leader goes silent until its lease runs out
+            db.query(SchedulerLease).filter(SchedulerLease.name == "test-lease").update(
+                {SchedulerLease.expires_at: datetime.utcnow() - timedelta(seconds=1)}
+            )
+            db.commit()
+            assert second.try_acquire()
+            assert not first.try_acquire()
+            
+            second.release()
+            assert db.query(SchedulerLease).filter(SchedulerLease.name == "test-lease").count() == 0
+        db.close()
+    
+    def test_scheduler_pauses_when_leadership_is_lost(self):
+        """Test the lease loop resumes jobs on gaining the lease and pauses them on losing it"""
+        from unittest.mock import MagicMock
+        from services.scheduler import SchedulerService
+        
+        service = SchedulerService()
+        service.scheduler = MagicMock()
+        service.lease = MagicMock()
+        service.lease.try_acquire.side_effect = [True, True, False]
+        rounds = []
+        
+        def next_round(timeout):
+            rounds.append(service.is_leader)
+            if len(rounds) == 3:
+                service._lease_stop.set()
+        
+        with patch.object(service, "_schedule_recurring_tasks") as mock_schedule, \
+                patch.object(service._lease_stop, "wait", side_effect=next_round):
+            service._maintain_lease()
+        
+        assert rounds == [True, True, False]
+        mock_schedule.assert_called_once()
+        service.scheduler.resume.assert_called_once()
+        service.scheduler.wakeup.assert_called_once()
+        service.scheduler.pause.assert_called_once()
+        if service.loop is not None:
+            service.loop.close()
+    
+    def test_payout_batches_never_repeat_a_wallet(self):
+        """Test payouts are packed into transfer batches without repeated recipients"""
+        from types import SimpleNamespace
+        from services.payout_engine import PayoutEngine
+        
+        payouts = [
+            (SimpleNamespace(id=index), wallet_id)
+            for index, wallet_id in enumerate(["0.0.1", "0.0.2", "0.0.1", "0.0.3", "0.0.4"])
+        ]
+        
+        batches = PayoutEngine.chunk_payouts(payouts, max_recipients=3)
+        
+        assert sum(len(batch) for batch in batches) == len(payouts)
+        for batch in batches:
+            wallets = [wallet_id for _, wallet_id in batch]
+            assert len(batch) <= 3
+            assert len(wallets) == len(set(wallets))
+    
+    def test_payout_queries_do_not_grow_with_holders(self, test_asset):
+        """Test snapshot loading, payout creation and submission issue a fixed number of SELECTs"""
+        from datetime import datetime
+        from sqlalchemy import event
+        from models.models import (
+            AssetIncomeRollup, Holding, HolderSnapshot, HolderSnapshotEntry, IncomeDistribution, IncomePayout
+        )
+        from services.holder_snapshots import holder_snapshots
+        from services.payout_engine import payout_engine
+        
+        db = TestingSessionLocal()
+        holders = [User(wallet_id=f"0.0.payee{index}", public_key=f"payee_key_{index}") for index in range(4)]
+        db.add_all(holders)
+        db.flush()
+        for user in holders:
+            db.add(Holding(user_id=user.id, asset_id=test_asset.id, ft_id=test_asset.ft_id, amount=5.0))
+        distribution = IncomeDistribution(
+            asset_id=test_asset.id, total_income=20.0, distribution_date=datetime.utcnow()
+        )
+        db.add(distribution)
+        db.commit()
+        snapshot = holder_snapshots.for_distribution(db, distribution)
+        
+        selects = []
+        
+        def count_selects(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+        
+        event.listen(engine, "before_cursor_execute", count_selects)
+        try:
+            payees = holder_snapshots.load_holders(db, snapshot.id)
+            payout_engine.create_payouts(db, distribution, payees)
+            assert len(payees) == 4
+            assert len(selects) == 2
+            
+            db.refresh(distribution)
+            selects.clear()
+            with patch.object(settings, "HEDERA_MAX_TRANSFERS_PER_TX", 3), \
+                    patch("services.payout_engine.hedera_service.new_transaction_id",
+                          side_effect=[f"0.0.3@{index}.0" for index in range(2)]), \
+                    patch("services.payout_engine.hedera_service.submit_batch_hbar_transfer",
+                          AsyncMock(return_value={"status": "submitted"})) as mock_submit:
+                asyncio.run(payout_engine.submit_pending(db, distribution))
+            assert mock_submit.await_count == 2
+            assert len(selects) == 1
+        finally:
+            event.remove(engine, "before_cursor_execute", count_selects)
+        
+        statuses = {status for (status,) in db.query(IncomePayout.status)}
+        assert statuses == {"submitted"}
+        
+        db.query(IncomePayout).delete()
+        db.delete(distribution)
+        db.commit()
+        db.query(HolderSnapshotEntry).delete()
+        db.query(HolderSnapshot).delete()
+        db.query(Holding).delete()
+        db.query(AssetIncomeRollup).delete()
+        for user in holders:
+            db.delete(user)
+        db.commit()
+        db.close()
+    
+    def test_payout_submission_commits_once_per_chunk(self, test_asset):
+        """Test submission claims and settles whole chunks of batches with one commit each"""
+        from datetime import datetime
+        from sqlalchemy import event, insert
+        from models.models import AssetIncomeRollup, IncomeDistribution, IncomePayout
+        from services.payout_engine import payout_engine
+        
+        db = TestingSessionLocal()
+        holders = [User(wallet_id=f"0.0.chunk{index}", public_key=f"chunk_key_{index}") for index in range(12)]
+        db.add_all(holders)
+        distribution = IncomeDistribution(
+            asset_id=test_asset.id, total_income=12.0, distribution_date=datetime.utcnow()
+        )
+        db.add(distribution)
+        db.flush()
+        db.execute(insert(IncomePayout), [
+            {"distribution_id": distribution.id, "user_id": user.id, "amount": 1.0, "status": "pending"}
+            for user in holders
+        ])
+        db.commit()
+        contested_id = db.query(IncomePayout.id).filter(IncomePayout.user_id == holders[-1].id).scalar()
+        
+        transaction_ids = iter(f"0.0.3@{index}.0" for index in range(100))
+        
+        def new_transaction_id(payer_account):
+            # Another run claims the last payout while this run is claiming its chunk
+            other = TestingSessionLocal()
+            other.query(IncomePayout).filter(IncomePayout.id == contested_id).update(
+                {IncomePayout.status: "submitting", IncomePayout.transaction_id: "0.0.3@999.0"}
+            )
+            other.commit()
+            other.close()
+            return next(transaction_ids)
+        
+        commits = []
+        event.listen(db, "after_commit", lambda session: commits.append(1))
+        with patch.object(settings, "HEDERA_MAX_TRANSFERS_PER_TX", 3), \
+                patch.object(settings, "PAYOUT_COMMIT_BATCH_SIZE", 4), \
+                patch("services.payout_engine.hedera_service.new_transaction_id", side_effect=new_transaction_id), \
+                patch("services.payout_engine.hedera_service.submit_batch_hbar_transfer",
+                      AsyncMock(return_value={"status": "submitted"})) as mock_submit:
+            asyncio.run(payout_engine.submit_pending(db, distribution))
+        
+        # 6 transfers of 2 in 3 chunks: one commit up front, then a claim and a settle per chunk
+        assert len(commits) == 7
+        assert mock_submit.await_count == 5
+        statuses = dict(db.query(IncomePayout.user_id, IncomePayout.status))
+        assert statuses.pop(holders[-1].id) == "submitting"
+        assert sorted(statuses.values()) == ["pending"] + ["submitted"] * 10
+        
+        db.query(IncomePayout).delete()
+        db.delete(distribution)
+        db.commit()
+        db.query(AssetIncomeRollup).delete()
+        for user in holders:
+            db.delete(user)
+        db.commit()
+        db.close()
+    
+    def test_in_doubt_transfers_are_retried_only_after_expiry(self):
+        """Test unseen transfers are not resubmitted while they could still reach consensus"""
+        import time
+        from services.payout_engine import PayoutEngine
+        
+        now = int(time.time())
+        assert PayoutEngine._retry_is_safe(f"0.0.2@{now - settings.PAYOUT_RECONCILE_AFTER - 60}.0")
+        assert not PayoutEngine._retry_is_safe(f"0.0.2@{now}.0")
+        assert not PayoutEngine._retry_is_safe("not-a-transaction-id")
+    
+    def test_distribution_completes_only_when_every_payout_succeeds(self, test_user, test_asset):
+        """Test distributions with unsettled payouts stay resumable instead of completing"""
+        from datetime import datetime
+        from models.models import AssetIncomeRollup, Holding, HolderSnapshot, HolderSnapshotEntry, IncomeDistribution
+        from services.scheduler import scheduler, RESUMABLE_STATUSES
+        
+        db = TestingSessionLocal()
+        db.add(Holding(user_id=test_user.id, asset_id=test_asset.id, ft_id=test_asset.ft_id, amount=10.0))
+        distribution = IncomeDistribution(
+            asset_id=test_asset.id, total_income=50.0, distribution_date=datetime.utcnow()
+        )
+        db.add(distribution)
+        db.commit()
+        
+        unsettled = {"successful": 3, "failed": 0, "pending": 1, "in_flight": 2}
+        settled = {"successful": 6, "failed": 0, "pending": 0, "in_flight": 0}
+        with patch("services.scheduler.SessionLocal", TestingSessionLocal), \
+                patch("services.scheduler.payout_engine.run", AsyncMock(side_effect=[unsettled, settled])), \
+                patch("services.scheduler.payout_engine.recover", AsyncMock()):
+            asyncio.run(scheduler._execute_income_distribution(distribution.id))
+            db.refresh(distribution)
+            assert distribution.status in RESUMABLE_STATUSES
+            
+            asyncio.run(scheduler._execute_income_distribution(distribution.id, resume=True))
+            db.refresh(distribution)
+            assert distribution.status == "completed"
+        
+        db.delete(distribution)
+        db.commit()
+        db.query(HolderSnapshotEntry).delete()
+        db.query(HolderSnapshot).delete()
+        db.query(Holding).delete()
+        db.query(AssetIncomeRollup).delete()
+        db.commit()
+        db.close()
+    
+    def test_overdue_distributions_drain_per_asset_in_parallel(self, test_user, test_asset):
+        """Test catch-up overlaps different assets but runs one asset's distributions in order"""
+        from datetime import datetime, timedelta
+        from models.models import AssetIncomeRollup, IncomeDistribution
+        from services.scheduler import scheduler
+        
+        db = TestingSessionLocal()
+        other_asset = Asset(
+            nft_id="0.0.drainnft", ft_id="0.0.drainft", asset_type="art",
+            name="Drain Asset", valuation=1000.0, creator_id=test_user.id
+        )
+        db.add(other_asset)
+        db.flush()
+        overdue = datetime.utcnow() - timedelta(days=1)
+        distributions = [
+            IncomeDistribution(
+                asset_id=asset_id, total_income=10.0, distribution_date=overdue + timedelta(minutes=index)
+            )
+            for index, asset_id in enumerate([test_asset.id, test_asset.id, other_asset.id])
+        ]
+        db.add_all(distributions)
+        db.commit()
+        first, second, other = (distribution.id for distribution in distributions)
+        
+        events = []
+        
+        async def execute(distribution_id, resume=False):
+            events.append(("start", distribution_id))
+            await asyncio.sleep(0.01)
+            events.append(("end", distribution_id))
+        
+        with patch("services.scheduler.SessionLocal", TestingSessionLocal), \
+                patch.object(settings, "DISTRIBUTION_CATCHUP_CONCURRENCY", 2), \
+                patch.object(scheduler, "_execute_income_distribution", side_effect=execute):
+            asyncio.run(scheduler._process_pending_distributions())
+        
+        # The other asset starts before the first asset's queue has finished
+        assert events.index(("start", other)) < events.index(("end", first))
+        # The same asset's distributions never overlap and keep their date order
+        assert events.index(("end", first)) < events.index(("start", second))
+        assert scheduler.catchup_stats["processed"] == 3
+        assert scheduler.catchup_stats["assets"] == 2
+        
+        for distribution in distributions:
+            db.delete(distribution)
+        db.delete(other_asset)
+        db.commit()
+        db.query(AssetIncomeRollup).delete()
+        db.commit()
+        db.close()
+    
+    def test_jobs_run_on_the_scheduler_loop_within_limits(self):
+        """Test run_now dispatches to the dedicated loop, bounded by the job limit and timeout"""
+        import threading
+        from services.scheduler import SchedulerService
+        
+        with patch.object(settings, "SCHEDULER_MODE", "asyncio"), \
+                patch.object(settings, "SCHEDULER_JOBSTORE", "memory"), \
+                patch.object(settings, "SCHEDULER_MAX_CONCURRENT_JOBS", 2):
+            service = SchedulerService()
+        loop_thread = threading.Thread(target=service._run_loop, daemon=True)
+        loop_thread.start()
+        
+        running = []
+        peak = []
+        
+        async def probe():
+            running.append(asyncio.get_running_loop())
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.pop()
+            return asyncio.get_running_loop()
+        
+        async def hang():
+            await asyncio.sleep(1)
+        
+        service._probe = probe
+        service._hang = hang
+        
+        async def run_many():
+            return await asyncio.gather(*(service.run_now("_probe") for _ in range(5)))
+        
+        try:
+            loops = asyncio.run(run_many())
+            assert all(loop is service.loop for loop in loops)
+            assert max(peak) == 2
+            
+            with patch.object(settings, "SCHEDULER_JOB_TIMEOUT", 0.05):
+                with pytest.raises(asyncio.TimeoutError):
+                    asyncio.run(service.run_now("_hang"))
+        finally:
+            service.loop.call_soon_threadsafe(service.loop.stop)
+            loop_thread.join(timeout=5)
+    
+    def test_timed_out_distribution_is_resumed_by_catchup(self, test_user, test_asset):
+        """Test a distribution cut off by the job timeout is resumed once it goes stale"""
+        from datetime import datetime, timedelta
+        from models.models import AssetIncomeRollup, Holding, HolderSnapshot, HolderSnapshotEntry, IncomeDistribution
+        from services.scheduler import scheduler
+        
+        db = TestingSessionLocal()
+        db.add(Holding(user_id=test_user.id, asset_id=test_asset.id, ft_id=test_asset.ft_id, amount=10.0))
+        distribution = IncomeDistribution(
+            asset_id=test_asset.id, total_income=50.0, distribution_date=datetime.utcnow() - timedelta(hours=1)
+        )
+        db.add(distribution)
+        db.commit()
+        
+        async def hang(db, distribution, holders):
+            await asyncio.sleep(1)
+        
+        settled = {"successful": 1, "failed": 0, "pending": 0, "in_flight": 0}
+        recover = AsyncMock()
+        with patch("services.scheduler.SessionLocal", TestingSessionLocal), \
+                patch.object(settings, "SCHEDULER_JOB_TIMEOUT", 60.0), \
+                patch("services.scheduler.payout_engine.recover", recover):
+            with patch.object(settings, "SCHEDULER_JOB_TIMEOUT", 0.05), \
+                    patch("services.scheduler.payout_engine.run", side_effect=hang):
+                with pytest.raises(asyncio.TimeoutError):
+                    asyncio.run(scheduler._run_job("_execute_income_distribution", distribution.id))
+            db.refresh(distribution)
+            assert distribution.status == "processing"
+            
+            with patch("services.scheduler.payout_engine.run", AsyncMock(return_value=settled)) as run:
+                # Still within the timeout: the run could be live, so catch-up leaves it alone
+                asyncio.run(scheduler._process_pending_distributions())
+                run.assert_not_called()
+                
+                db.query(IncomeDistribution).filter(IncomeDistribution.id == distribution.id).update(
+                    {"updated_at": datetime.utcnow() - timedelta(minutes=5)}
+                )
+                db.commit()
+                asyncio.run(scheduler._process_pending_distributions())
+                run.assert_called_once()
+            
+            recover.assert_called_once()
+            db.refresh(distribution)
+            assert distribution.status == "completed"
+        
+        db.delete(distribution)
+        db.commit()
+        db.query(HolderSnapshotEntry).delete()
+        db.query(HolderSnapshot).delete()
+        db.query(Holding).delete()
+        db.query(AssetIncomeRollup).delete()
+        db.commit()
+        db.close()
+    
     def test_get_scheduled_jobs(self):
         """Test getting scheduled jobs"""
         from services.scheduler import scheduler
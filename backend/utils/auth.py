@@ -2,16 +2,21 @@
 Authentication utilities for AssetFraction Backend
 """
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, TypeVar
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from database.database import get_db
 from models.models import User
+from utils.cache import TTLCache
 from utils.config import settings
 
 # Password hashing
@@ -20,6 +25,19 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT token scheme
 security = HTTPBearer()
 
+# JWT verification runs here so a burst of authenticated requests only queues
+# other token checks instead of stalling the event loop for every request
+cpu_executor = ThreadPoolExecutor(
+    max_workers=settings.AUTH_CPU_WORKERS, thread_name_prefix="auth-cpu"
+)
+
+T = TypeVar("T")
+
+# Resolved users keyed by token signature, sized in entries rather than bytes
+principal_cache = TTLCache(
+    max_bytes=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES, sizeof=lambda principal: 1
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -31,6 +49,11 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def run_cpu_bound(func: Callable[..., T], *args) -> T:
+    """Run a CPU-bound auth primitive on the auth executor"""
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, func, *args)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -53,6 +76,30 @@ def verify_token(token: str) -> Optional[dict]:
         return None
 
 
+async def verify_token_async(token: str) -> Optional[dict]:
+    """Verify and decode a JWT token without blocking the event loop"""
+    return await run_cpu_bound(verify_token, token)
+
+
+def _principal(user: User) -> Dict[str, Any]:
+    """Copy a user's column values for the principal cache"""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+def _attach_principal(db: Session, principal: Dict[str, Any]) -> User:
+    """Attach a cached user to the request session without querying the database"""
+    user = User(**principal)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def invalidate_principal(user_id: int):
+    """Drop cached principals for a user whose KYC status or profile changed"""
+    # Only this process's cache is cleared: other workers keep serving the old
+    # user until AUTH_PRINCIPAL_CACHE_TTL runs out
+    principal_cache.invalidate_where(lambda entry: entry[1]["id"] == user_id)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -64,8 +111,13 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    signing_input, _, signature = credentials.credentials.rpartition(".")
+    cached = principal_cache.get(signature)
+    if cached is not None and cached[0] == signing_input:
+        return _attach_principal(db, cached[1])
+    
     try:
-        payload = verify_token(credentials.credentials)
+        payload = await verify_token_async(credentials.credentials)
         if payload is None:
             raise credentials_exception
         
@@ -80,6 +132,11 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
     
+    # Never serve a principal past its token's expiry
+    ttl = min(settings.AUTH_PRINCIPAL_CACHE_TTL, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        principal_cache.set(signature, (signing_input, _principal(user)), ttl)
+    
     return user
 
 
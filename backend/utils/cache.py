@@ -0,0 +1,133 @@
+"""
+In-memory TTL + LRU cache with single-flight loading
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """TTL cache bounded by an approximate memory budget with LRU eviction"""
+    
+    def __init__(self, max_bytes: int, sizeof: Optional[Callable[[Any], int]] = None):
+        """Initialize cache"""
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or self._json_size
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _json_size(value: Any) -> int:
+        """Approximate the memory footprint of a JSON-like value"""
+        return len(json.dumps(value, default=str))
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a live cached value, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """Store a value for `ttl` seconds, evicting least recently used entries"""
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        
+        if key in self._entries:
+            self._remove(key)
+        
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self.current_bytes += size
+        
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    def invalidate(self, key: Hashable):
+        """Drop a cached value"""
+        if key in self._entries:
+            self._remove(key)
+    
+    def invalidate_where(self, predicate: Callable[[Any], bool]):
+        """Drop every cached value matching `predicate`"""
+        for key in [key for key, (value, _, _) in self._entries.items() if predicate(value)]:
+            self._remove(key)
+    
+    def clear(self):
+        """Drop all cached values"""
+        self._entries.clear()
+        self.current_bytes = 0
+    
+    def _remove(self, key: Hashable):
+        """Remove an entry and release its size budget"""
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+    
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                          ttl: float) -> Any:
+        """Get a cached value, loading it once for all concurrent callers on a miss"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(key)
+        if pending is not None and pending.get_loop() is loop:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+        
+        # The load runs detached from its first caller, so cancelling that
+        # caller only abandons its own wait, not everyone else's
+        self.misses += 1
+        task = loop.create_task(self._load(key, loader, ttl))
+        task.add_done_callback(self._retrieve_exception)
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+    
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        """Load and cache a value on behalf of every caller waiting for it"""
+        try:
+            value = await loader()
+            self.set(key, value, ttl)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+    
+    @staticmethod
+    def _retrieve_exception(task: asyncio.Task):
+        """Mark a failed load's exception as retrieved when every caller has gone"""
+        if not task.cancelled():
+            task.exception()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss metrics"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
@@ -20,15 +20,52 @@ class Settings(BaseSettings):
     TREASURY_ID: str
     TREASURY_KEY: str
     HCS_TOPIC_ID: str
+    HEDERA_MAX_TRANSFERS_PER_TX: int = 10  # Network limit on HBAR account amounts per transfer
     MIRROR_NODE_API: str = "https://testnet.mirrornode.hedera.com/api/v1"
     
+    # Mirror Node Client Configuration
+    MIRROR_NODE_TIMEOUT: float = 10.0  # seconds
+    MIRROR_NODE_CONNECT_TIMEOUT: float = 5.0  # seconds
+    MIRROR_NODE_MAX_CONNECTIONS: int = 100
+    MIRROR_NODE_MAX_KEEPALIVE: int = 20
+    MIRROR_NODE_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    MIRROR_NODE_MAX_CONCURRENCY_PER_HOST: int = 20
+    MIRROR_NODE_FANOUT_CONCURRENCY: int = 10  # Parallel per-token page fetches
+    MIRROR_NODE_PROOF_CONCURRENCY: int = 25  # Parallel proof lookups per request
+    MIRROR_PORTFOLIO_SECTION_TIMEOUT: float = 5.0  # seconds per portfolio section
+    
+    # Mirror Node Response Cache Configuration
+    MIRROR_CACHE_MAX_BYTES: int = 33554432  # 32MB
+    MIRROR_CACHE_TOKEN_TTL: float = 3600.0  # Token/NFT info is effectively immutable
+    MIRROR_CACHE_ACCOUNT_TTL: float = 5.0  # Balances tolerate a few seconds of staleness
+    
+    # Mirror Node Indexer Configuration
+    MIRROR_SYNC_PAGE_SIZE: int = 100  # Mirror Node maximum page size
+    MIRROR_SYNC_CONCURRENCY: int = 5  # Accounts / lookups synced in parallel
+    MIRROR_INDEX_MAX_AGE: float = 1800.0  # seconds; older indexes fall back to live Mirror Node calls
+    
     # JWT Configuration
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_PRINCIPAL_CACHE_TTL: float = 30.0  # seconds a resolved user is reused for the same token; also how stale other workers may be after a KYC change
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000  # Cached tokens, least recently used evicted first
+    AUTH_CPU_WORKERS: int = 4  # Threads for JWT verification
     
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./assetfraction.db"
+    DB_AUTO_MIGRATE: bool = True  # Apply pending migrations at startup (serialized by an advisory lock on PostgreSQL); disable for multi-worker SQLite and run 'alembic upgrade head' on deploy
+    ASYNC_DATABASE_URL: Optional[str] = None  # Defaults to DATABASE_URL with its async driver
+    DB_POOL_SIZE: int = 5  # Persistent connections per engine
+    DB_MAX_OVERFLOW: int = 10  # Extra connections opened under load
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced, -1 disables
+    DB_POOL_PRE_PING: bool = True  # Test connections before handing them out
+    SQLITE_BUSY_TIMEOUT: int = 5000  # milliseconds a writer waits on a locked database
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # 'NORMAL' is durable across app crashes in WAL mode
+    SQLITE_MMAP_SIZE: int = 268435456  # bytes of the database file memory-mapped for reads
+    DATABASE_REPLICA_URLS: str = ""  # Comma-separated read replica URLs, empty reads from the primary
+    READ_YOUR_WRITES_WINDOW: float = 5.0  # seconds a client's reads stay on the primary after a write
     
     # API Configuration
     API_HOST: str = "0.0.0.0"
@@ -37,6 +74,19 @@ class Settings(BaseSettings):
     
     # Scheduler Configuration
     SCHEDULER_TIMEZONE: str = "UTC"
+    SCHEDULER_MODE: str = "asyncio"  # 'asyncio' (dedicated event loop) or 'background' (threads)
+    SCHEDULER_MAX_CONCURRENT_JOBS: int = 4
+    SCHEDULER_JOB_TIMEOUT: float = 3600.0  # seconds, 0 disables the timeout; catch-up resumes distributions processing longer
+    SCHEDULER_JOBSTORE: str = "sqlalchemy"  # 'sqlalchemy' (persistent, shared) or 'memory'
+    SCHEDULER_LEASE_TTL: float = 30.0  # seconds before a silent leader is replaced
+    SCHEDULER_LEASE_RENEW_INTERVAL: float = 10.0  # seconds
+    
+    # Payout Engine Configuration
+    PAYOUT_SUBMIT_CONCURRENCY: int = 10  # Transfers in flight per distribution
+    PAYOUT_RECEIPT_CONCURRENCY: int = 20  # Receipt queries in flight per distribution
+    PAYOUT_COMMIT_BATCH_SIZE: int = 100  # Payout rows per commit
+    PAYOUT_RECONCILE_AFTER: int = 300  # Seconds after a transfer's valid start before it may be retried
+    DISTRIBUTION_CATCHUP_CONCURRENCY: int = 4  # Assets drained in parallel after an outage
     
     # File Upload Configuration
     MAX_FILE_SIZE: int = 10485760  # 10MB
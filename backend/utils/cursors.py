@@ -0,0 +1,27 @@
+"""
+Opaque pagination cursors
+"""
+
+import base64
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Encode a keyset position as an opaque URL-safe cursor"""
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, **fields: type) -> Dict[str, Any]:
+    """Decode a cursor, raising ValueError unless it has each field with the given type"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    for name, field_type in fields.items():
+        if not isinstance(position.get(name), field_type) or isinstance(position.get(name), bool):
+            raise ValueError("Invalid cursor")
+    return position